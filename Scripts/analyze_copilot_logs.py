@@ -1,72 +1,267 @@
 #!/usr/bin/env python3
 import argparse
+import csv
+import gzip
+import io
 import json
+import lzma
+import math
+import os
+import random
 import re
+import shutil
+import sqlite3
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 
 
 TIMESTAMP_RE = re.compile(r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d+Z)")
+CAMEL_RE = re.compile(r"(?<!^)(?=[A-Z])")
+COMPRESSED_SUFFIXES = (".gz", ".xz", ".zst")
+ARCHIVE_SIDECAR = "metrics.json"
+
+
+def snake_case(name):
+    return CAMEL_RE.sub("_", name).lower()
 
 
 def parse_ts(value):
     return datetime.fromisoformat(value.replace("Z", "+00:00"))
 
 
+def zstandard_module():
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise SystemExit("[ERROR] .zst logs require the zstandard package: pip install zstandard") from exc
+    return zstandard
+
+
+def open_log(path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    if path.suffix == ".xz":
+        return lzma.open(path, "rb")
+    if path.suffix == ".zst":
+        return io.BufferedReader(zstandard_module().ZstdDecompressor().stream_reader(path.open("rb"), closefd=True))
+    return path.open("rb")
+
+
+def uncompressed_name(path):
+    return path.name[: -len(path.suffix)] if path.suffix in COMPRESSED_SUFFIXES else path.name
+
+
+def find_logs(directory, pattern):
+    paths = [
+        path
+        for suffix in ("",) + COMPRESSED_SUFFIXES
+        for path in directory.glob(pattern + suffix)
+    ]
+    return sorted(paths, key=lambda path: (str(path.parent), uncompressed_name(path)))
+
+
 def read_text(path):
     try:
-        return path.read_text(encoding="utf-8", errors="replace")
+        with open_log(path) as handle:
+            return handle.read().decode("utf-8", errors="replace")
     except FileNotFoundError:
         return ""
 
 
-def count_lines(text, needle):
-    return sum(1 for line in text.splitlines() if needle in line)
+PROCESS_LOG_MARKERS = [
+    ("model_request_markers", ("Sending request to the AI model",)),
+    ("task_validation_failures", ("Task tool validation failed",)),
+    ("tool_validation_failures", ("Multiple validation errors",)),
+    ("task_invocations", ("Task tool invoked",)),
+    ("custom_agent_invocations", ("Custom agent",)),
+    ("notion_tool_errors", ("Error in tool call", "status: 400", "status: 404")),
+]
 
+# Counters that only a full scan of events.jsonl can produce; --summary-only
+# leaves them as None instead of reporting zeros.
+SCAN_ONLY_EVENT_FIELDS = (
+    "events_usage_input_tokens",
+    "events_usage_output_tokens",
+    "events_tool_calls",
+    "events_failed_tool_calls",
+    "events_failed_task_tools",
+    "translation_validator_invocations",
+    "translation_validator_passes",
+    "translation_validator_failures",
+)
 
-def process_log_metrics(run_dir):
+AGGREGATE_FIELDS = [
+    ("duration_seconds", "seconds"),
+    ("shutdown_api_duration_ms", "api_ms"),
+    ("shutdown_input_tokens", "input_tokens"),
+    ("shutdown_request_count", "requests"),
+]
+
+EXPORT_RUN_COLUMNS = [
+    "root",
+    "run",
+    "path",
+    "signature",
+    "prompt_mode",
+    "prompt_chars",
+    "validation",
+    "effective",
+    "completion",
+    "version",
+    "exit_code",
+    "duration_seconds",
+    "process_seconds",
+    "task_complete_success",
+    "task_complete_at",
+    "shutdown_at",
+    "shutdown_api_duration_ms",
+    "shutdown_request_count",
+    "shutdown_input_tokens",
+    "shutdown_output_tokens",
+    "events_tool_calls",
+    "events_failed_tool_calls",
+    "task_validation_failures",
+    "tool_validation_failures",
+    "translation_validator_invocations",
+    "translation_validator_passes",
+    "translation_validator_failures",
+    "row_json",
+]
+
+EXPORT_EVENT_COLUMNS = [
+    "path",
+    "seq",
+    "type",
+    "timestamp",
+    "agent_id",
+    "tool_call_id",
+    "tool_name",
+    "agent_name",
+    "success",
+    "model",
+    "input_tokens",
+    "output_tokens",
+]
+
+EXPORT_FORMATS = {"sqlite", "csv", "parquet"}
+
+PRICE_FIELDS = [
+    ("input_tokens", "input_per_mtok"),
+    ("output_tokens", "output_per_mtok"),
+    ("cache_read_tokens", "cache_read_per_mtok"),
+    ("cache_write_tokens", "cache_write_per_mtok"),
+]
+
+FOLLOW_EXIT_TASK_COMPLETE = 0
+FOLLOW_EXIT_TASK_FAILED = 3
+FOLLOW_EXIT_TIMEOUT = 124
+
+
+def new_process_log_metrics():
     metrics = {
         "process_log": None,
         "process_seconds": None,
-        "model_request_markers": 0,
-        "task_validation_failures": 0,
-        "tool_validation_failures": 0,
-        "task_invocations": 0,
-        "custom_agent_invocations": 0,
-        "notion_tool_errors": 0,
     }
+    for name, _needles in PROCESS_LOG_MARKERS:
+        metrics[name] = 0
+    return metrics
+
+
+def apply_process_line(metrics, line):
+    for name, needles in PROCESS_LOG_MARKERS:
+        for needle in needles:
+            if needle in line:
+                metrics[name] += 1
 
-    logs = sorted((run_dir / "copilot-home" / "logs").glob("*.log"))
-    if not logs:
+
+def latest_process_log(run_dir):
+    logs = find_logs(run_dir / "copilot-home" / "logs", "*.log")
+    return logs[-1] if logs else None
+
+
+def process_log_metrics(run_dir):
+    metrics = new_process_log_metrics()
+
+    log_path = latest_process_log(run_dir)
+    if log_path is None:
         return metrics
 
-    log_path = logs[-1]
-    text = read_text(log_path)
     metrics["process_log"] = str(log_path)
-    metrics["model_request_markers"] = count_lines(text, "Sending request to the AI model")
-    metrics["task_validation_failures"] = count_lines(text, "Task tool validation failed")
-    metrics["tool_validation_failures"] = count_lines(text, "Multiple validation errors")
-    metrics["task_invocations"] = count_lines(text, "Task tool invoked")
-    metrics["custom_agent_invocations"] = count_lines(text, "Custom agent")
-    metrics["notion_tool_errors"] = (
-        count_lines(text, "Error in tool call")
-        + count_lines(text, "status: 400")
-        + count_lines(text, "status: 404")
-    )
+    for line in read_text(log_path).splitlines():
+        apply_process_line(metrics, line)
+    metrics["process_seconds"] = process_seconds(log_path)
+
+    return metrics
+
+
+def process_duration_metrics(run_dir):
+    metrics = new_process_log_metrics()
+    # Marker counts need the whole process log, which --summary-only skips.
+    for name, _needles in PROCESS_LOG_MARKERS:
+        metrics[name] = None
+    log_path = latest_process_log(run_dir)
+    if log_path is not None:
+        metrics["process_log"] = str(log_path)
+        metrics["process_seconds"] = process_seconds(log_path)
+    return metrics
+
 
-    timestamps = []
-    for line in text.splitlines():
+def iter_lines_forward(path):
+    offset = 0
+    with open_log(path) as handle:
+        for raw in handle:
+            yield offset, raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            offset += len(raw)
+
+
+def iter_lines_reverse(path, block_size=64 * 1024):
+    if path.suffix in COMPRESSED_SUFFIXES:
+        lines = list(iter_lines_forward(path))
+        yield from reversed(lines)
+        return
+    with path.open("rb") as handle:
+        position = handle.seek(0, os.SEEK_END)
+        remainder = b""
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            handle.seek(position)
+            lines = (handle.read(read_size) + remainder).split(b"\n")
+            remainder = lines.pop(0)
+            line_end = position + len(remainder) + 1
+            offsets = []
+            for line in lines:
+                offsets.append(line_end)
+                line_end += len(line) + 1
+            for line_offset, line in zip(reversed(offsets), reversed(lines)):
+                yield line_offset, line.decode("utf-8", errors="replace").rstrip("\r")
+        yield 0, remainder.decode("utf-8", errors="replace").rstrip("\r")
+
+
+def first_timestamp(lines):
+    for offset, line in lines:
         match = TIMESTAMP_RE.match(line)
         if match:
-            timestamps.append(parse_ts(match.group(1)))
-    if len(timestamps) >= 2:
-        metrics["process_seconds"] = round((timestamps[-1] - timestamps[0]).total_seconds(), 3)
+            return offset, parse_ts(match.group(1))
+    return None, None
 
-    return metrics
 
+def process_seconds(log_path):
+    first_offset, first_at = first_timestamp(iter_lines_forward(log_path))
+    if first_at is None:
+        return None
+    last_offset, last_at = first_timestamp(iter_lines_reverse(log_path))
+    if last_offset == first_offset:
+        return None
+    return round((last_at - first_at).total_seconds(), 3)
 
-def events_metrics(run_dir):
-    metrics = {
+
+def new_events_metrics():
+    return {
         "events_file": None,
         "task_complete_success": None,
         "task_complete_at": None,
@@ -77,81 +272,105 @@ def events_metrics(run_dir):
         "shutdown_request_count": None,
         "shutdown_input_tokens": None,
         "shutdown_output_tokens": None,
+        "shutdown_cache_read_tokens": None,
+        "shutdown_cache_write_tokens": None,
+        "model_metrics": {},
+        "primary_model": None,
+        "request_timeline": [],
+        "events_usage_input_tokens": 0,
+        "events_usage_output_tokens": 0,
         "events_tool_calls": 0,
         "events_failed_tool_calls": 0,
         "events_failed_task_tools": 0,
         "translation_validator_invocations": 0,
         "translation_validator_passes": 0,
         "translation_validator_failures": 0,
+        "timeline_seconds": None,
+        "tool_busy_seconds": None,
+        "model_wait_seconds": None,
+        "tool_durations_ms": {},
+        "slowest_segments": [],
     }
 
-    events_files = sorted((run_dir / "copilot-home" / "session-state").glob("*/events.jsonl"))
-    if not events_files:
-        return metrics
 
-    events_path = events_files[-1]
-    metrics["events_file"] = str(events_path)
-    validator_tool_ids = set()
+def numeric_fields(values):
+    return {
+        snake_case(key): value
+        for key, value in values.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
 
-    for raw in read_text(events_path).splitlines():
-        try:
-            event = json.loads(raw)
-        except json.JSONDecodeError:
-            continue
 
-        event_type = event.get("type")
-        data = event.get("data") or {}
-
-        if event_type == "assistant.message":
-            metrics["events_tool_calls"] += len(data.get("toolRequests") or [])
-            content = str(data.get("content") or "")
-            if event.get("agentId") in validator_tool_ids:
-                if '"status":"PASS"' in content or '"status": "PASS"' in content:
-                    metrics["translation_validator_passes"] += 1
-                elif '"status":"FAIL"' in content or '"status": "FAIL"' in content:
-                    metrics["translation_validator_failures"] += 1
-        elif event_type == "tool.execution_complete":
-            if data.get("success") is False:
-                metrics["events_failed_tool_calls"] += 1
-            if data.get("toolName") == "task" and data.get("success") is False:
-                metrics["events_failed_task_tools"] += 1
-            result = data.get("result") or {}
-            content = str(result.get("content") or "")
-            if data.get("toolCallId") in validator_tool_ids:
-                if '"status":"PASS"' in content or '"status": "PASS"' in content:
-                    metrics["translation_validator_passes"] += 1
-                elif '"status":"FAIL"' in content or '"status": "FAIL"' in content:
-                    metrics["translation_validator_failures"] += 1
-            elif "agent_type: translation-validator" in content:
-                if '"status":"PASS"' in content or '"status": "PASS"' in content:
-                    metrics["translation_validator_passes"] += 1
-                elif '"status":"FAIL"' in content or '"status": "FAIL"' in content:
-                    metrics["translation_validator_failures"] += 1
-        elif event_type == "session.task_complete":
-            metrics["task_complete_success"] = data.get("success")
-            metrics["task_complete_at"] = event.get("timestamp")
-        elif event_type == "session.shutdown":
-            metrics["shutdown_seen"] = True
-            metrics["shutdown_at"] = event.get("timestamp")
-            metrics["shutdown_api_duration_ms"] = data.get("totalApiDurationMs")
-            model_metrics = data.get("modelMetrics") or {}
-            request_count = 0
-            input_tokens = 0
-            output_tokens = 0
-            for model in model_metrics.values():
-                request_count += ((model.get("requests") or {}).get("count") or 0)
-                usage = model.get("usage") or {}
-                input_tokens += usage.get("inputTokens") or 0
-                output_tokens += usage.get("outputTokens") or 0
-            metrics["shutdown_request_count"] = request_count
-            metrics["shutdown_input_tokens"] = input_tokens
-            metrics["shutdown_output_tokens"] = output_tokens
-        elif event_type == "subagent.started":
-            if data.get("agentName") == "translation-validator":
-                metrics["translation_validator_invocations"] += 1
-                if data.get("toolCallId"):
-                    validator_tool_ids.add(data["toolCallId"])
+def apply_validator_status(metrics, content):
+    if '"status":"PASS"' in content or '"status": "PASS"' in content:
+        metrics["translation_validator_passes"] += 1
+    elif '"status":"FAIL"' in content or '"status": "FAIL"' in content:
+        metrics["translation_validator_failures"] += 1
+
+
+def apply_event(metrics, event, validator_tool_ids):
+    event_type = event.get("type")
+    data = event.get("data") or {}
+
+    if event_type == "assistant.message":
+        metrics["events_tool_calls"] += len(data.get("toolRequests") or [])
+        if event.get("agentId") in validator_tool_ids:
+            apply_validator_status(metrics, str(data.get("content") or ""))
+    elif event_type == "assistant.usage":
+        metrics["events_usage_input_tokens"] += data.get("inputTokens") or 0
+        metrics["events_usage_output_tokens"] += data.get("outputTokens") or 0
+        entry = {"at": event.get("timestamp"), "model": data.get("model"), "agent_id": event.get("agentId")}
+        entry.update(numeric_fields(data))
+        metrics["request_timeline"].append(entry)
+    elif event_type == "tool.execution_complete":
+        if data.get("success") is False:
+            metrics["events_failed_tool_calls"] += 1
+        if data.get("toolName") == "task" and data.get("success") is False:
+            metrics["events_failed_task_tools"] += 1
+        result = data.get("result") or {}
+        content = str(result.get("content") or "")
+        if data.get("toolCallId") in validator_tool_ids or "agent_type: translation-validator" in content:
+            apply_validator_status(metrics, content)
+    elif event_type == "session.task_complete":
+        metrics["task_complete_success"] = data.get("success")
+        metrics["task_complete_at"] = event.get("timestamp")
+    elif event_type == "session.shutdown":
+        metrics["shutdown_seen"] = True
+        metrics["shutdown_at"] = event.get("timestamp")
+        metrics["shutdown_api_duration_ms"] = data.get("totalApiDurationMs")
+        model_metrics = {}
+        for model_name, model in (data.get("modelMetrics") or {}).items():
+            entry = {f"requests_{key}": value for key, value in numeric_fields(model.get("requests") or {}).items()}
+            entry.update(numeric_fields(model.get("usage") or {}))
+            model_metrics[model_name] = entry
+        metrics["model_metrics"] = model_metrics
+        metrics["shutdown_request_count"] = sum(entry.get("requests_count", 0) for entry in model_metrics.values())
+        metrics["shutdown_input_tokens"] = sum(entry.get("input_tokens", 0) for entry in model_metrics.values())
+        metrics["shutdown_output_tokens"] = sum(entry.get("output_tokens", 0) for entry in model_metrics.values())
+        metrics["shutdown_cache_read_tokens"] = sum(entry.get("cache_read_tokens", 0) for entry in model_metrics.values())
+        metrics["shutdown_cache_write_tokens"] = sum(
+            entry.get("cache_write_tokens", 0) for entry in model_metrics.values()
+        )
+        if model_metrics:
+            metrics["primary_model"] = max(
+                model_metrics, key=lambda name: model_metrics[name].get("requests_count", 0)
+            )
+    elif event_type == "subagent.started":
+        if data.get("agentName") == "translation-validator":
+            metrics["translation_validator_invocations"] += 1
+            if data.get("toolCallId"):
+                validator_tool_ids.add(data["toolCallId"])
+
+
+def parse_event_line(raw):
+    try:
+        event = json.loads(raw)
+    except json.JSONDecodeError:
+        return None
+    return event if isinstance(event, dict) else None
+
 
+def finish_events_metrics(metrics):
     if metrics["task_complete_at"] and metrics["shutdown_at"]:
         metrics["task_complete_to_shutdown_seconds"] = round(
             (
@@ -160,10 +379,201 @@ def events_metrics(run_dir):
             ).total_seconds(),
             3,
         )
-
     return metrics
 
 
+def new_timing_state():
+    return {
+        "first_at": None,
+        "last_at": None,
+        "task_complete_at": None,
+        "tool_starts": {},
+        "subagent_starts": {},
+        "spans": [],
+    }
+
+
+def apply_timing_event(state, event):
+    timestamp = event.get("timestamp")
+    if not timestamp:
+        return
+    try:
+        at = parse_ts(timestamp)
+    except ValueError:
+        return
+
+    event_type = event.get("type")
+    data = event.get("data") or {}
+    if state["first_at"] is None:
+        state["first_at"] = at
+    state["last_at"] = at
+    tool_call_id = data.get("toolCallId")
+
+    if event_type == "tool.execution_start" and tool_call_id:
+        state["tool_starts"][tool_call_id] = (at, data.get("toolName"), event.get("agentId"))
+    elif event_type == "tool.execution_complete" and tool_call_id in state["tool_starts"]:
+        started_at, tool_name, agent_id = state["tool_starts"].pop(tool_call_id)
+        state["spans"].append(
+            {
+                "kind": "tool",
+                "name": data.get("toolName") or tool_name or "unknown",
+                "start": started_at,
+                "end": at,
+                "agent_id": event.get("agentId") or agent_id,
+                "tool_call_id": tool_call_id,
+                "success": data.get("success"),
+            }
+        )
+    elif event_type == "subagent.started" and tool_call_id:
+        state["subagent_starts"][tool_call_id] = (at, data.get("agentName"))
+    elif event_type in ("subagent.completed", "subagent.failed") and tool_call_id in state["subagent_starts"]:
+        started_at, agent_name = state["subagent_starts"].pop(tool_call_id)
+        state["spans"].append(
+            {
+                "kind": "subagent",
+                "name": f"subagent:{data.get('agentName') or agent_name or 'unknown'}",
+                "start": started_at,
+                "end": at,
+                "agent_id": event.get("agentId"),
+                "tool_call_id": tool_call_id,
+                "success": event_type == "subagent.completed",
+            }
+        )
+    elif event_type == "session.task_complete":
+        state["task_complete_at"] = at
+
+
+def top_level_segments(spans, start, end):
+    segments = []
+    cursor = start
+    for span in sorted(spans, key=lambda item: item["start"]):
+        if span["kind"] != "tool" or span["agent_id"] or span["start"] >= end:
+            continue
+        if span["start"] > cursor:
+            segments.append({"kind": "model", "name": "model", "start": cursor, "end": span["start"]})
+        if span["end"] > cursor:
+            segments.append(
+                {"kind": "tool", "name": span["name"], "start": max(span["start"], cursor), "end": min(span["end"], end)}
+            )
+            cursor = min(span["end"], end)
+    if end > cursor:
+        segments.append({"kind": "model", "name": "model", "start": cursor, "end": end})
+    return segments
+
+
+def finish_timing(state, metrics, spans=None):
+    if state["first_at"] is None:
+        return
+    end = state["task_complete_at"] or state["last_at"]
+    segments = top_level_segments(state["spans"], state["first_at"], end)
+    tool_busy = sum((item["end"] - item["start"]).total_seconds() for item in segments if item["kind"] == "tool")
+    timeline = (end - state["first_at"]).total_seconds()
+    metrics["timeline_seconds"] = round(timeline, 3)
+    metrics["tool_busy_seconds"] = round(tool_busy, 3)
+    metrics["model_wait_seconds"] = round(timeline - tool_busy, 3)
+
+    durations = {}
+    for span in state["spans"]:
+        durations.setdefault(span["name"], []).append(round((span["end"] - span["start"]).total_seconds() * 1000, 1))
+    metrics["tool_durations_ms"] = durations
+    # The main agent's segments are sequential; these are its five longest,
+    # not a dependency chain through parallel subagent work.
+    metrics["slowest_segments"] = [
+        {"kind": item["kind"], "name": item["name"], "seconds": round((item["end"] - item["start"]).total_seconds(), 3)}
+        for item in sorted(segments, key=lambda item: item["end"] - item["start"], reverse=True)[:5]
+    ]
+    if spans is not None:
+        spans.extend(state["spans"])
+        spans.extend(item for item in segments if item["kind"] == "model")
+
+
+def chrome_trace(run_name, spans):
+    if not spans:
+        return {"traceEvents": [], "displayTimeUnit": "ms"}
+    origin = min(span["start"] for span in spans)
+    lanes = {None: 0}
+    for span in sorted(spans, key=lambda item: item["start"]):
+        if span["kind"] == "subagent":
+            lanes.setdefault(span["tool_call_id"], len(lanes))
+    trace_events = [
+        {"name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": run_name}},
+        {"name": "thread_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": "main agent"}},
+    ]
+    for span in spans:
+        if span["kind"] == "subagent":
+            tid = lanes[span["tool_call_id"]]
+            trace_events.append(
+                {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": span["name"]}}
+            )
+        else:
+            tid = lanes.get(span.get("agent_id"), 0)
+        trace_events.append(
+            {
+                "name": span["name"],
+                "cat": span["kind"],
+                "ph": "X",
+                "pid": 1,
+                "tid": tid,
+                "ts": round((span["start"] - origin).total_seconds() * 1_000_000),
+                "dur": round((span["end"] - span["start"]).total_seconds() * 1_000_000),
+                "args": {"success": span.get("success"), "toolCallId": span.get("tool_call_id")},
+            }
+        )
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+
+def latest_events_file(run_dir):
+    events_files = find_logs(run_dir / "copilot-home" / "session-state", "*/events.jsonl")
+    return events_files[-1] if events_files else None
+
+
+def events_summary_metrics(run_dir):
+    metrics = new_events_metrics()
+    metrics.update(dict.fromkeys(SCAN_ONLY_EVENT_FIELDS))
+
+    events_path = latest_events_file(run_dir)
+    if events_path is None:
+        return metrics
+
+    metrics["events_file"] = str(events_path)
+    for _offset, raw in iter_lines_reverse(events_path):
+        if metrics["shutdown_seen"] and '"session.task_complete"' not in raw:
+            continue
+        if '"session.shutdown"' not in raw and '"session.task_complete"' not in raw:
+            continue
+        event = parse_event_line(raw)
+        if event is None:
+            continue
+        if event.get("type") == "session.shutdown" and not metrics["shutdown_seen"]:
+            apply_event(metrics, event, set())
+        elif event.get("type") == "session.task_complete":
+            apply_event(metrics, event, set())
+            break
+
+    return finish_events_metrics(metrics)
+
+
+def events_metrics(run_dir, spans=None):
+    metrics = new_events_metrics()
+
+    events_path = latest_events_file(run_dir)
+    if events_path is None:
+        return metrics
+
+    metrics["events_file"] = str(events_path)
+    validator_tool_ids = set()
+    timing = new_timing_state()
+
+    for raw in read_text(events_path).splitlines():
+        event = parse_event_line(raw)
+        if event is not None:
+            apply_event(metrics, event, validator_tool_ids)
+            apply_timing_event(timing, event)
+
+    finish_timing(timing, metrics, spans)
+    return finish_events_metrics(metrics)
+
+
 def run_status(run_dir):
     status_file = run_dir / "status.env"
     status = {}
@@ -174,7 +584,25 @@ def run_status(run_dir):
     return status
 
 
-def collect_run(run_dir):
+def archived_row(run_dir):
+    sidecar = run_dir / ARCHIVE_SIDECAR
+    if not sidecar.exists():
+        return None
+    try:
+        cached = json.loads(sidecar.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return None
+    if cached.get("signature") != run_signature(run_dir):
+        return None
+    return cached.get("row")
+
+
+def collect_run(run_dir, spans=None, summary_only=False):
+    if spans is None:
+        cached = archived_row(run_dir)
+        if cached is not None:
+            return cached
+
     prompt = read_text(run_dir / "prompt.txt")
     status = run_status(run_dir)
     result = {
@@ -192,14 +620,20 @@ def collect_run(run_dir):
         "version": status.get("version"),
         "duration_seconds": float(status["duration_seconds"]) if status.get("duration_seconds") else None,
     }
-    result.update(process_log_metrics(run_dir))
-    result.update(events_metrics(run_dir))
+    if summary_only:
+        result.update(process_duration_metrics(run_dir))
+        result.update(events_summary_metrics(run_dir))
+        validator_passed = status.get("validator") == "PASS"
+    else:
+        result.update(process_log_metrics(run_dir))
+        result.update(events_metrics(run_dir, spans))
+        validator_passed = (result.get("translation_validator_passes") or 0) >= 1
     result["effective"] = (
         "PASS"
         if result.get("validation") == "PASS"
         and result.get("task_complete_success") is True
         and result.get("prompt_mode") == "i"
-        and (result.get("translation_validator_passes") or 0) >= 1
+        and validator_passed
         else "FAIL"
     )
     return result
@@ -230,28 +664,831 @@ def print_table(rows):
         parts = []
         for name, _label, width in columns:
             value = row.get(name)
-            parts.append(("" if value is None else str(value))[:width].ljust(width))
+            parts.append(("-" if value is None else str(value))[:width].ljust(width))
         print(" ".join(parts))
 
 
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * q
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def mean(values):
+    return sum(values) / len(values) if values else None
+
+
+def stdev(values):
+    if len(values) < 2:
+        return None
+    average = mean(values)
+    return math.sqrt(sum((value - average) ** 2 for value in values) / (len(values) - 1))
+
+
+def field_values(rows, field):
+    return [row[field] for row in rows if isinstance(row.get(field), (int, float))]
+
+
+def describe(values):
+    return {
+        "count": len(values),
+        "mean": mean(values),
+        "p50": percentile(values, 0.50),
+        "p90": percentile(values, 0.90),
+        "p99": percentile(values, 0.99),
+        "stdev": stdev(values),
+    }
+
+
+def aggregate_rows(rows):
+    groups = {"all": rows}
+    for row in rows:
+        groups.setdefault(f"effective={row.get('effective')}", []).append(row)
+    return {
+        group: {field: describe(field_values(group_rows, field)) for field, _label in AGGREGATE_FIELDS}
+        for group, group_rows in groups.items()
+    }
+
+
+def format_number(value):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.1f}"
+    return str(value)
+
+
+def print_aggregate(aggregate):
+    columns = [("count", 6), ("mean", 12), ("p50", 12), ("p90", 12), ("p99", 12), ("stdev", 12)]
+    header = "group".ljust(16) + " " + "metric".ljust(12) + " " + " ".join(name.ljust(width) for name, width in columns)
+    print()
+    print(header)
+    print("-" * len(header))
+    for group, fields in aggregate.items():
+        for field, label in AGGREGATE_FIELDS:
+            stats = fields[field]
+            parts = [group[:16].ljust(16), label.ljust(12)]
+            parts.extend(format_number(stats[name])[:width].ljust(width) for name, width in columns)
+            print(" ".join(parts))
+
+
+def numpy_module():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def bootstrap_mean_delta(values_a, values_b, iterations, rng, confidence=0.95):
+    # Cost is iterations * (len(values_a) + len(values_b)) draws; numpy does
+    # them in one vectorized batch, the fallback draws each resample with choices().
+    if not values_a or not values_b:
+        return None, None
+    tail = (1 - confidence) / 2
+    numpy = numpy_module()
+    if numpy is not None:
+        generator = numpy.random.default_rng(rng.getrandbits(64))
+        array_a = numpy.asarray(values_a, dtype=float)
+        array_b = numpy.asarray(values_b, dtype=float)
+        deltas = generator.choice(array_b, (iterations, len(array_b))).mean(axis=1) - generator.choice(
+            array_a, (iterations, len(array_a))
+        ).mean(axis=1)
+        low, high = numpy.quantile(deltas, [tail, 1 - tail])
+        return float(low), float(high)
+    deltas = []
+    for _ in range(iterations):
+        sample_a = rng.choices(values_a, k=len(values_a))
+        sample_b = rng.choices(values_b, k=len(values_b))
+        deltas.append(sum(sample_b) / len(sample_b) - sum(sample_a) / len(sample_a))
+    return percentile(deltas, tail), percentile(deltas, 1 - tail)
+
+
+def compare_rows(rows_a, rows_b, iterations, seed):
+    rng = random.Random(seed)
+    rows_a = [row for row in rows_a if row.get("effective") == "PASS"]
+    rows_b = [row for row in rows_b if row.get("effective") == "PASS"]
+    comparison = {}
+    for field, _label in AGGREGATE_FIELDS:
+        values_a = field_values(rows_a, field)
+        values_b = field_values(rows_b, field)
+        mean_a = mean(values_a)
+        mean_b = mean(values_b)
+        delta = mean_b - mean_a if mean_a is not None and mean_b is not None else None
+        ci_low, ci_high = bootstrap_mean_delta(values_a, values_b, iterations, rng)
+        comparison[field] = {
+            "count_a": len(values_a),
+            "count_b": len(values_b),
+            "mean_a": mean_a,
+            "mean_b": mean_b,
+            "delta": delta,
+            "delta_pct": delta / mean_a * 100 if delta is not None and mean_a else None,
+            "ci95_low": ci_low,
+            "ci95_high": ci_high,
+            "significant": ci_low is not None and (ci_low > 0 or ci_high < 0),
+        }
+    return comparison
+
+
+def print_comparison(comparison, root_a, root_b):
+    columns = [
+        ("count_a", "n_a", 5),
+        ("count_b", "n_b", 5),
+        ("mean_a", "mean_a", 12),
+        ("mean_b", "mean_b", 12),
+        ("delta", "delta", 12),
+        ("delta_pct", "delta_%", 8),
+        ("ci95_low", "ci95_low", 12),
+        ("ci95_high", "ci95_high", 12),
+        ("significant", "sig", 5),
+    ]
+    print()
+    print(f"compare effective=PASS runs: A={root_a} B={root_b} (delta = B - A)")
+    header = "metric".ljust(12) + " " + " ".join(label.ljust(width) for _name, label, width in columns)
+    print(header)
+    print("-" * len(header))
+    for field, label in AGGREGATE_FIELDS:
+        stats = comparison[field]
+        parts = [label.ljust(12)]
+        for name, _label, width in columns:
+            value = stats[name]
+            text = ("yes" if value else "no") if isinstance(value, bool) else format_number(value)
+            parts.append(text[:width].ljust(width))
+        print(" ".join(parts))
+
+
+def run_signature(run_dir):
+    parts = []
+    for path in (run_dir / "status.env", latest_process_log(run_dir), latest_events_file(run_dir)):
+        try:
+            stat = path.stat() if path is not None else None
+        except FileNotFoundError:
+            stat = None
+        parts.append(f"{stat.st_size}:{stat.st_mtime_ns}" if stat else "-")
+    return "|".join(parts)
+
+
+def event_row(path, seq, event):
+    data = event.get("data") or {}
+    usage = data.get("usage") if isinstance(data.get("usage"), dict) else data
+    success = data.get("success")
+    return {
+        "path": path,
+        "seq": seq,
+        "type": event.get("type"),
+        "timestamp": event.get("timestamp"),
+        "agent_id": event.get("agentId"),
+        "tool_call_id": data.get("toolCallId"),
+        "tool_name": data.get("toolName"),
+        "agent_name": data.get("agentName"),
+        "success": None if success is None else int(bool(success)),
+        "model": data.get("model"),
+        "input_tokens": usage.get("inputTokens"),
+        "output_tokens": usage.get("outputTokens"),
+    }
+
+
+def event_rows(row):
+    if not row.get("events_file"):
+        return []
+    rows = []
+    for seq, raw in enumerate(read_text(Path(row["events_file"])).splitlines()):
+        event = parse_event_line(raw)
+        if event is not None:
+            rows.append(event_row(row["path"], seq, event))
+    return rows
+
+
+def export_run_row(root, row, signature):
+    values = {name: row.get(name) for name in EXPORT_RUN_COLUMNS}
+    values["root"] = str(root)
+    values["signature"] = signature
+    values["task_complete_success"] = (
+        None if row.get("task_complete_success") is None else int(bool(row["task_complete_success"]))
+    )
+    values["row_json"] = json.dumps(row, ensure_ascii=False)
+    return values
+
+
+def open_export_db(db_path):
+    connection = sqlite3.connect(db_path)
+    connection.execute(
+        f"CREATE TABLE IF NOT EXISTS runs ({', '.join(EXPORT_RUN_COLUMNS)}, PRIMARY KEY (path))"
+    )
+    connection.execute(
+        f"CREATE TABLE IF NOT EXISTS events ({', '.join(EXPORT_EVENT_COLUMNS)}, PRIMARY KEY (path, seq))"
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS events_type ON events (type)")
+    connection.execute("CREATE INDEX IF NOT EXISTS events_tool_name ON events (tool_name)")
+    return connection
+
+
+def append_csv(path, columns, rows, replaced_paths=()):
+    if not rows:
+        return
+    if replaced_paths and path.exists():
+        # Re-exported runs replace their earlier rows, as they do in SQLite.
+        with path.open(encoding="utf-8", newline="") as handle:
+            kept = [row for row in csv.DictReader(handle) if row.get("path") not in replaced_paths]
+        partial = path.with_name(f"{path.name}.partial")
+        with partial.open("w", encoding="utf-8", newline="") as handle:
+            writer = csv.DictWriter(handle, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(kept)
+        partial.replace(path)
+    write_header = not path.exists() or path.stat().st_size == 0
+    with path.open("a", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=columns)
+        if write_header:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_parquet_part(directory, columns, rows, batch_name, replaced_paths=()):
+    if not rows:
+        return
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise SystemExit("[ERROR] Parquet export requires pyarrow: pip install pyarrow") from exc
+    directory.mkdir(parents=True, exist_ok=True)
+    if replaced_paths:
+        # Parts are immutable batches; rewrite the ones holding rows of re-exported runs.
+        replaced = pa.array(sorted(replaced_paths))
+        for part in sorted(directory.glob("part-*.parquet")):
+            existing = pq.read_table(part)
+            stale = pc.is_in(existing["path"], value_set=replaced)
+            if not pc.any(stale).as_py():
+                continue
+            kept = existing.filter(pc.invert(stale))
+            if kept.num_rows:
+                partial = part.with_name(f"{part.name}.partial")
+                pq.write_table(kept, partial)
+                partial.replace(part)
+            else:
+                part.unlink()
+    table = pa.Table.from_pylist(rows, schema=None).select(columns)
+    pq.write_table(table, directory / f"part-{batch_name}.parquet")
+
+
+def export_runs(root, run_dirs, out_dir, formats):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    connection = open_export_db(out_dir / "copilot_runs.sqlite")
+    known = dict(connection.execute("SELECT path, signature FROM runs"))
+    new_runs = []
+    new_events = []
+    replaced_paths = set()
+    skipped = 0
+
+    with connection:
+        for run_dir in run_dirs:
+            signature = run_signature(run_dir)
+            if known.get(str(run_dir)) == signature:
+                skipped += 1
+                continue
+            if str(run_dir) in known:
+                replaced_paths.add(str(run_dir))
+            row = collect_run(run_dir)
+            run_values = export_run_row(root, row, signature)
+            events = event_rows(row)
+            connection.execute("DELETE FROM events WHERE path = ?", (row["path"],))
+            connection.execute(
+                f"INSERT OR REPLACE INTO runs VALUES ({', '.join('?' for _ in EXPORT_RUN_COLUMNS)})",
+                [run_values[name] for name in EXPORT_RUN_COLUMNS],
+            )
+            connection.executemany(
+                f"INSERT INTO events VALUES ({', '.join('?' for _ in EXPORT_EVENT_COLUMNS)})",
+                [[event[name] for name in EXPORT_EVENT_COLUMNS] for event in events],
+            )
+            new_runs.append(run_values)
+            new_events.extend(events)
+    connection.close()
+
+    if "csv" in formats:
+        append_csv(out_dir / "runs.csv", EXPORT_RUN_COLUMNS, new_runs, replaced_paths)
+        append_csv(out_dir / "events.csv", EXPORT_EVENT_COLUMNS, new_events, replaced_paths)
+    if "parquet" in formats:
+        # Two exports in the same second must not overwrite each other's part.
+        batch_name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        write_parquet_part(out_dir / "runs", EXPORT_RUN_COLUMNS, new_runs, batch_name, replaced_paths)
+        write_parquet_part(out_dir / "events", EXPORT_EVENT_COLUMNS, new_events, batch_name, replaced_paths)
+
+    print(
+        f"[export] {out_dir}: {len(new_runs)} runs and {len(new_events)} events written, "
+        f"{skipped} unchanged runs skipped"
+    )
+
+
+def print_latency(rows):
+    durations = {}
+    for row in rows:
+        for name, values in (row.get("tool_durations_ms") or {}).items():
+            durations.setdefault(name, []).extend(values)
+
+    columns = [("count", 6), ("mean", 10), ("p50", 10), ("p90", 10), ("p99", 10), ("max", 10)]
+    header = "tool".ljust(32) + " " + " ".join(name.ljust(width) for name, width in columns)
+    print()
+    print(header)
+    print("-" * len(header))
+    for name, values in sorted(durations.items(), key=lambda item: sum(item[1]), reverse=True):
+        stats = describe(values)
+        stats["max"] = max(values)
+        parts = [name[:32].ljust(32)]
+        parts.extend(format_number(stats[key])[:width].ljust(width) for key, width in columns)
+        print(" ".join(parts))
+
+    print()
+    header = "run".ljust(12) + " " + "timeline_s".ljust(10) + " " + "model_s".ljust(10) + " " + "tool_s".ljust(10) + " slowest_segments"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        slowest = ", ".join(f"{item['name']} {item['seconds']}s" for item in row.get("slowest_segments") or [])
+        print(
+            " ".join(
+                [
+                    row["run"][:12].ljust(12),
+                    format_number(row.get("timeline_seconds")).ljust(10),
+                    format_number(row.get("model_wait_seconds")).ljust(10),
+                    format_number(row.get("tool_busy_seconds")).ljust(10),
+                    slowest,
+                ]
+            )
+        )
+
+
+def load_prices(path):
+    prices = json.loads(Path(path).read_text(encoding="utf-8"))
+    if not isinstance(prices, dict):
+        raise SystemExit(f"[ERROR] Price table must be a JSON object keyed by model: {path}")
+    return prices
+
+
+def model_cost(entry, price):
+    cost = (entry.get("requests_count") or 0) * (price.get("per_request") or 0)
+    for usage_field, price_field in PRICE_FIELDS:
+        cost += (entry.get(usage_field) or 0) * (price.get(price_field) or 0) / 1_000_000
+    return cost
+
+
+def apply_prices(rows, prices):
+    missing = set()
+    for row in rows:
+        model_metrics = row.get("model_metrics") or {}
+        if not model_metrics:
+            row["cost"] = None
+            continue
+        cost = 0.0
+        for model_name, entry in model_metrics.items():
+            price = prices.get(model_name) or prices.get("default")
+            if price is None:
+                missing.add(model_name)
+                cost = None
+                break
+            cost += model_cost(entry, price)
+        row["cost"] = None if cost is None else round(cost, 6)
+    for model_name in sorted(missing):
+        print(f"[WARN] No price for model {model_name} and no 'default' entry; its runs have no cost.", file=sys.stderr)
+
+
+def cost_report(rows):
+    groups = {}
+    for row in rows:
+        key = (row.get("prompt_mode") or "-", row.get("primary_model") or "-")
+        groups.setdefault(key, []).append(row)
+
+    report = []
+    for (prompt_mode, model_name), group_rows in sorted(groups.items()):
+        costs = [row["cost"] for row in group_rows if row.get("cost") is not None]
+        effective_costs = [row["cost"] for row in group_rows if row.get("cost") is not None and row.get("effective") == "PASS"]
+        effective = sum(1 for row in group_rows if row.get("effective") == "PASS")
+        total = sum(costs) if costs else None
+        report.append(
+            {
+                "prompt_mode": prompt_mode,
+                "model": model_name,
+                "runs": len(group_rows),
+                "effective": effective,
+                "total_cost": total,
+                "cost_per_effective": total / effective if total is not None and effective else None,
+                "mean_effective_run_cost": mean(effective_costs),
+            }
+        )
+    return report
+
+
+def print_cost_report(report):
+    columns = [
+        ("prompt_mode", "mode", 5),
+        ("model", "model", 28),
+        ("runs", "runs", 5),
+        ("effective", "eff", 5),
+        ("total_cost", "total_cost", 12),
+        ("cost_per_effective", "cost/eff", 12),
+        ("mean_effective_run_cost", "eff_run_avg", 12),
+    ]
+    header = " ".join(label.ljust(width) for _name, label, width in columns)
+    print()
+    print(header)
+    print("-" * len(header))
+    for entry in report:
+        parts = []
+        for name, _label, width in columns:
+            value = entry[name]
+            text = f"{value:.4f}" if isinstance(value, float) else format_number(value)
+            parts.append(text[:width].ljust(width))
+        print(" ".join(parts))
+
+
+def print_model_breakdown(rows):
+    totals = {}
+    for row in rows:
+        for model_name, entry in (row.get("model_metrics") or {}).items():
+            model_total = totals.setdefault(model_name, {})
+            for key, value in entry.items():
+                model_total[key] = model_total.get(key, 0) + value
+    if not totals:
+        return
+    keys = sorted({key for entry in totals.values() for key in entry})
+    header = "model".ljust(28) + " " + " ".join(key[:16].ljust(16) for key in keys)
+    print()
+    print(header)
+    print("-" * len(header))
+    for model_name, entry in sorted(totals.items()):
+        print(model_name[:28].ljust(28) + " " + " ".join(format_number(entry.get(key))[:16].ljust(16) for key in keys))
+
+
+def open_compressed_output(path, compression):
+    if compression == "gz":
+        return gzip.open(path, "wb")
+    if compression == "xz":
+        return lzma.open(path, "wb")
+    return zstandard_module().ZstdCompressor(level=10).stream_writer(path.open("wb"), closefd=True)
+
+
+def compress_file(path, compression):
+    source = Path(path)
+    target = source.with_name(f"{source.name}.{compression}")
+    partial = target.with_name(f"{target.name}.partial")
+    with source.open("rb") as reader, open_compressed_output(partial, compression) as writer:
+        shutil.copyfileobj(reader, writer, 1024 * 1024)
+    shutil.copystat(source, partial)
+    partial.replace(target)
+    before = source.stat().st_size
+    source.unlink()
+    return before, target.stat().st_size
+
+
+def archivable_files(run_dir):
+    home = run_dir / "copilot-home"
+    files = list((home / "logs").glob("*.log"))
+    files.extend((home / "session-state").glob("*/events.jsonl"))
+    return files
+
+
+def archive_runs(root, compression, jobs):
+    if compression == "zst":
+        zstandard_module()
+    pending = []
+    for run_dir in find_run_dirs(root):
+        if not (run_dir / "status.env").exists():
+            continue
+        files = archivable_files(run_dir)
+        if files:
+            pending.append((run_dir, collect_run(run_dir), files))
+
+    before_total = 0
+    after_total = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        # Queue every file of every run at once so the workers stay busy across
+        # runs; a run's sidecar is written as soon as its last file is done.
+        futures = {}
+        remaining = {}
+        for run_dir, row, files in pending:
+            remaining[run_dir] = len(files)
+            for path in files:
+                futures[pool.submit(compress_file, str(path), compression)] = (run_dir, row, files)
+        for future in as_completed(futures):
+            before, after = future.result()
+            before_total += before
+            after_total += after
+            run_dir, row, files = futures[future]
+            remaining[run_dir] -= 1
+            if remaining[run_dir]:
+                continue
+            process_log = latest_process_log(run_dir)
+            events_path = latest_events_file(run_dir)
+            row["process_log"] = str(process_log) if process_log else None
+            row["events_file"] = str(events_path) if events_path else None
+            (run_dir / ARCHIVE_SIDECAR).write_text(
+                json.dumps({"signature": run_signature(run_dir), "row": row}, ensure_ascii=False, indent=2) + "\n",
+                encoding="utf-8",
+            )
+            print(f"[archive] {run_dir.name}: {len(files)} files", flush=True)
+
+    print(f"[archive] {len(pending)} runs, {before_total} -> {after_total} bytes")
+
+
+def archive_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="analyze_copilot_logs.py archive",
+        description="Compress finished runs' process logs and events.jsonl and keep a metrics sidecar.",
+    )
+    parser.add_argument("root", nargs="?", default="logs/new_version_copilot")
+    parser.add_argument("--format", choices=("gz", "xz", "zst"), default="gz", help="Compression format (default: gz).")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Parallel compression workers.")
+    args = parser.parse_args(argv)
+    archive_runs(Path(args.root), args.format, args.jobs)
+
+
+def find_run_dirs(root):
+    if (root / "prompt.txt").exists():
+        return [root]
+    return sorted(path for path in root.glob("run.*") if path.is_dir())
+
+
+def read_new_lines(path, offset):
+    try:
+        with path.open("rb") as handle:
+            handle.seek(0, 2)
+            if handle.tell() < offset:
+                offset = 0
+            handle.seek(offset)
+            chunk = handle.read()
+    except FileNotFoundError:
+        return [], offset
+
+    end = chunk.rfind(b"\n")
+    if end == -1:
+        return [], offset
+    lines = chunk[: end + 1].decode("utf-8", errors="replace").splitlines()
+    return lines, offset + end + 1
+
+
+def follow_summary(metrics):
+    fields = [
+        ("requests", metrics.get("model_request_markers")),
+        ("input_tokens", metrics.get("events_usage_input_tokens")),
+        ("output_tokens", metrics.get("events_usage_output_tokens")),
+        ("tool_calls", metrics.get("events_tool_calls")),
+        ("tool_failures", metrics.get("events_failed_tool_calls")),
+        ("task_err", metrics.get("task_validation_failures")),
+        ("tool_err", metrics.get("tool_validation_failures")),
+        ("tv", metrics.get("translation_validator_invocations")),
+        ("tv_ok", metrics.get("translation_validator_passes")),
+        ("tv_fail", metrics.get("translation_validator_failures")),
+    ]
+    return " ".join(f"{name}={value}" for name, value in fields)
+
+
+def run_finished(run_dir):
+    if (run_dir / "status.env").exists():
+        return True
+    events_path = latest_events_file(run_dir)
+    return events_path is not None and '"session.task_complete"' in read_text(events_path)
+
+
+def live_run_dir(root, existing):
+    # Prefer a run created since --follow started; otherwise only a run that
+    # has not finished yet, so a harness that starts --follow before its new
+    # session's directory exists never latches onto the previous run.
+    run_dirs = find_run_dirs(root)
+    if run_dirs == [root]:
+        return root
+    new_dirs = [path for path in run_dirs if path not in existing]
+    if new_dirs:
+        return new_dirs[-1]
+    for path in reversed(run_dirs):
+        if not run_finished(path):
+            return path
+    return None
+
+
+def follow_run(root, poll_interval, timeout, json_out=None):
+    existing = set(find_run_dirs(root))
+    started = time.monotonic()
+    run_dir = live_run_dir(root, existing)
+    while run_dir is None:
+        if timeout is not None and time.monotonic() - started >= timeout:
+            print(f"[follow] no unfinished run directory under {root}", file=sys.stderr)
+            return FOLLOW_EXIT_TIMEOUT
+        time.sleep(poll_interval)
+        run_dir = live_run_dir(root, existing)
+
+    metrics = {"run": run_dir.name, "path": str(run_dir)}
+    metrics.update(new_process_log_metrics())
+    metrics.update(new_events_metrics())
+    validator_tool_ids = set()
+    process_path = None
+    process_offset = 0
+    events_path = None
+    events_offset = 0
+    last_summary = None
+    print(f"[follow] {run_dir}", flush=True)
+
+    while True:
+        if process_path is None:
+            process_path = latest_process_log(run_dir)
+            if process_path is not None:
+                metrics["process_log"] = str(process_path)
+        if events_path is None:
+            events_path = latest_events_file(run_dir)
+            if events_path is not None:
+                metrics["events_file"] = str(events_path)
+
+        if process_path is not None:
+            lines, process_offset = read_new_lines(process_path, process_offset)
+            for line in lines:
+                apply_process_line(metrics, line)
+
+        task_complete = False
+        if events_path is not None:
+            lines, events_offset = read_new_lines(events_path, events_offset)
+            for raw in lines:
+                event = parse_event_line(raw)
+                if event is None:
+                    continue
+                apply_event(metrics, event, validator_tool_ids)
+                if event.get("type") == "session.task_complete":
+                    task_complete = True
+                    break
+
+        summary = follow_summary(metrics)
+        if summary != last_summary:
+            print(f"[follow] {summary}", flush=True)
+            last_summary = summary
+
+        if task_complete:
+            success = metrics["task_complete_success"] is True
+            print(
+                f"[follow] task_complete success={str(success).lower()} at={metrics['task_complete_at']}",
+                flush=True,
+            )
+            exit_code = FOLLOW_EXIT_TASK_COMPLETE if success else FOLLOW_EXIT_TASK_FAILED
+            break
+
+        if timeout is not None and time.monotonic() - started >= timeout:
+            print(f"[follow] timeout after {timeout}s without task_complete", file=sys.stderr, flush=True)
+            exit_code = FOLLOW_EXIT_TIMEOUT
+            break
+
+        time.sleep(poll_interval)
+
+    if json_out:
+        Path(json_out).write_text(
+            json.dumps(finish_events_metrics(metrics), ensure_ascii=False, indent=2) + "\n",
+            encoding="utf-8",
+        )
+    return exit_code
+
+
 def main():
-    parser = argparse.ArgumentParser(description="Summarize Copilot CLI prompt test cost from run logs.")
+    if sys.argv[1:2] == ["archive"]:
+        archive_main(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(
+        description=(
+            "Summarize Copilot CLI prompt test cost from run logs. "
+            "Use 'archive ROOT' to compress finished runs."
+        )
+    )
     parser.add_argument("root", nargs="?", default="logs/new_version_copilot")
     parser.add_argument("--json-out")
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help=(
+            "Tail the newest unfinished run's events.jsonl and process log (waiting for one to appear) and "
+            "exit as soon as session.task_complete "
+            f"arrives (exit {FOLLOW_EXIT_TASK_COMPLETE} on success, {FOLLOW_EXIT_TASK_FAILED} on failure, "
+            f"{FOLLOW_EXIT_TIMEOUT} on timeout)."
+        ),
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="ROOT_B",
+        help="Compare effective runs under ROOT_B against root and report mean deltas with bootstrap 95%% CIs.",
+    )
+    parser.add_argument(
+        "--bootstrap",
+        type=int,
+        default=2000,
+        help=(
+            "Bootstrap resamples for --compare (default: 2000). Runtime grows with resamples times runs; "
+            "numpy, when installed, vectorizes them. Lower it for quick looks at large run sets."
+        ),
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for --compare bootstrap.")
+    parser.add_argument(
+        "--export",
+        metavar="DIR",
+        help=(
+            "Append per-run and per-event rows to DIR/copilot_runs.sqlite, skipping runs whose logs are "
+            "unchanged since the last export. A run whose logs changed replaces its earlier rows in every "
+            "format."
+        ),
+    )
+    parser.add_argument(
+        "--export-format",
+        default="sqlite",
+        help="Comma-separated extra formats for --export: sqlite, csv, parquet (default: sqlite).",
+    )
+    parser.add_argument(
+        "--latency",
+        action="store_true",
+        help="Print per-tool latency distributions and the model-wait versus tool-time split per run.",
+    )
+    parser.add_argument(
+        "--trace-dir",
+        metavar="DIR",
+        help="Write a Chrome trace / Perfetto JSON timeline per run to DIR/<run>.trace.json.",
+    )
+    parser.add_argument(
+        "--models",
+        action="store_true",
+        help="Print per-model request and token totals (including cache fields) from session.shutdown.",
+    )
+    parser.add_argument(
+        "--prices",
+        metavar="FILE",
+        help=(
+            "JSON price table keyed by model name (or 'default') with input_per_mtok, output_per_mtok, "
+            "cache_read_per_mtok, cache_write_per_mtok and per_request; adds per-run cost and a "
+            "cost-per-effective-run report by prompt mode and model."
+        ),
+    )
+    parser.add_argument(
+        "--summary-only",
+        action="store_true",
+        help=(
+            "Only read durations and the last session.shutdown/task_complete by seeking from the end of each "
+            "log. The validator result comes from status.env; marker counts and tool/validator counters are "
+            "not collected and show as '-'. Cannot be combined with --trace-dir or --latency."
+        ),
+    )
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Seconds between --follow polls.")
+    parser.add_argument("--timeout", type=float, help="Give up --follow after this many seconds.")
     args = parser.parse_args()
 
+    if args.summary_only and (args.trace_dir or args.latency):
+        parser.error("--summary-only skips the full event scan that --trace-dir and --latency need")
+
     root = Path(args.root)
-    if (root / "prompt.txt").exists():
-        run_dirs = [root]
-    else:
-        run_dirs = sorted(path for path in root.glob("run.*") if path.is_dir())
+    if args.follow:
+        raise SystemExit(follow_run(root, args.poll_interval, args.timeout, args.json_out))
+
+    run_dirs = find_run_dirs(root)
 
-    rows = [collect_run(run_dir) for run_dir in run_dirs]
+    if args.export:
+        formats = {name.strip() for name in args.export_format.split(",") if name.strip()}
+        unknown = formats - EXPORT_FORMATS
+        if unknown:
+            parser.error(f"unknown --export-format: {', '.join(sorted(unknown))}")
+        export_runs(root, run_dirs, Path(args.export), formats)
+        return
+
+    rows = []
+    for run_dir in run_dirs:
+        spans = [] if args.trace_dir else None
+        rows.append(collect_run(run_dir, spans, args.summary_only))
+        if spans is not None:
+            trace_dir = Path(args.trace_dir)
+            trace_dir.mkdir(parents=True, exist_ok=True)
+            (trace_dir / f"{run_dir.name}.trace.json").write_text(
+                json.dumps(chrome_trace(run_dir.name, spans), ensure_ascii=False) + "\n",
+                encoding="utf-8",
+            )
+    if args.prices:
+        apply_prices(rows, load_prices(args.prices))
     print_table(rows)
+    aggregate = aggregate_rows(rows)
+    print_aggregate(aggregate)
+    if args.latency:
+        print_latency(rows)
+    if args.models:
+        print_model_breakdown(rows)
+    summary = {"root": str(root), "runs": rows, "aggregate": aggregate}
+    if args.prices:
+        summary["cost"] = cost_report(rows)
+        print_cost_report(summary["cost"])
+
+    if args.compare:
+        rows_b = [collect_run(run_dir, summary_only=args.summary_only) for run_dir in find_run_dirs(Path(args.compare))]
+        comparison = compare_rows(rows, rows_b, args.bootstrap, args.seed)
+        print_comparison(comparison, root, args.compare)
+        summary["compare"] = {"root": args.compare, "metrics": comparison}
 
     if args.json_out:
         Path(args.json_out).write_text(
-            json.dumps({"root": str(root), "runs": rows}, ensure_ascii=False, indent=2) + "\n",
+            json.dumps(summary, ensure_ascii=False, indent=2) + "\n",
             encoding="utf-8",
         )
 
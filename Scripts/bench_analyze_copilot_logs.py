@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import analyze_copilot_logs  # noqa: E402
+
+
+ANALYZER = Path(__file__).resolve().parent / "analyze_copilot_logs.py"
+DEFAULT_SIZES = "10,1000,10000"
+MODELS = ["Qwen3.6-35B-A3B-bf16", "gpt-5-mini"]
+TOOLS = ["notion-fetch", "notion-search", "create", "view", "edit"]
+NOISE_LINES = [
+    "[DEBUG] Received chunk from stream",
+    "[INFO] Autopilot continue",
+    "[DEBUG] Tool schema cached",
+    "[INFO] Session heartbeat",
+]
+EXPECTED_FIELDS = [
+    "effective",
+    "duration_seconds",
+    "process_seconds",
+    "model_request_markers",
+    "task_validation_failures",
+    "tool_validation_failures",
+    "task_invocations",
+    "custom_agent_invocations",
+    "notion_tool_errors",
+    "task_complete_success",
+    "shutdown_seen",
+    "shutdown_api_duration_ms",
+    "shutdown_request_count",
+    "shutdown_input_tokens",
+    "shutdown_output_tokens",
+    "events_tool_calls",
+    "events_failed_tool_calls",
+    "events_failed_task_tools",
+    "translation_validator_invocations",
+    "translation_validator_passes",
+    "translation_validator_failures",
+]
+
+
+def iso(value):
+    return value.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value.microsecond // 1000:03d}Z"
+
+
+def write_process_log(path, rng, started, turns, log_lines, expected):
+    markers = {
+        "model_request_markers": ("Sending request to the AI model", turns),
+        "task_validation_failures": ("Task tool validation failed", rng.randint(0, 2)),
+        "tool_validation_failures": ("Multiple validation errors", rng.randint(0, 2)),
+        "task_invocations": ("Task tool invoked", rng.randint(1, 2)),
+        "custom_agent_invocations": ("Custom agent loaded", rng.randint(0, 3)),
+        "notion_tool_errors": ("Error in tool call", rng.randint(0, 3)),
+    }
+    slots = max(log_lines, sum(count for _needle, count in markers.values()))
+    lines = [rng.choice(NOISE_LINES) for _ in range(slots)]
+    positions = rng.sample(range(slots), sum(count for _needle, count in markers.values()))
+    cursor = 0
+    for name, (needle, count) in markers.items():
+        for _ in range(count):
+            lines[positions[cursor]] = f"[INFO] {needle}"
+            cursor += 1
+        expected[name] = count
+
+    at = started
+    step = timedelta(milliseconds=rng.randint(5, 50))
+    with path.open("w", encoding="utf-8") as handle:
+        for index, line in enumerate(lines):
+            at += step
+            handle.write(f"{iso(at)} {line}\n")
+            if index % 5 == 4:
+                handle.write(f"    continuation of entry {index}\n")
+    expected["process_seconds"] = round((at - started - step).total_seconds(), 3) if slots > 1 else None
+
+
+def write_events(path, rng, started, turns, tool_calls, failure_rate, payload_bytes, validator_pass, expected):
+    at = started
+    events = [{"type": "session.start", "timestamp": iso(at), "data": {}}]
+    failed = 0
+    failed_tasks = 0
+    requested = 0
+    usage = {model: {"count": 0, "inputTokens": 0, "outputTokens": 0, "cacheReadTokens": 0} for model in MODELS}
+
+    def tick(low, high):
+        nonlocal at
+        at += timedelta(milliseconds=rng.randint(low, high))
+        return iso(at)
+
+    calls_left = tool_calls
+    for turn in range(turns):
+        model = MODELS[0] if turn % 4 else MODELS[1]
+        input_tokens = rng.randint(20_000, 60_000)
+        output_tokens = rng.randint(100, 2_000)
+        cache_read = rng.randint(0, input_tokens // 2)
+        usage[model]["count"] += 1
+        usage[model]["inputTokens"] += input_tokens
+        usage[model]["outputTokens"] += output_tokens
+        usage[model]["cacheReadTokens"] += cache_read
+        events.append(
+            {
+                "type": "assistant.usage",
+                "timestamp": tick(500, 4_000),
+                "data": {
+                    "model": model,
+                    "inputTokens": input_tokens,
+                    "outputTokens": output_tokens,
+                    "cacheReadTokens": cache_read,
+                },
+            }
+        )
+        per_turn = calls_left if turn == turns - 1 else min(calls_left, rng.randint(0, 2))
+        calls_left -= per_turn
+        tool_ids = [f"call_{uuid.UUID(int=rng.getrandbits(128)).hex[:12]}" for _ in range(per_turn)]
+        requested += per_turn
+        events.append(
+            {
+                "type": "assistant.message",
+                "timestamp": tick(10, 100),
+                "data": {
+                    "content": "x" * payload_bytes,
+                    "toolRequests": [{"toolCallId": tool_id, "name": rng.choice(TOOLS)} for tool_id in tool_ids],
+                },
+            }
+        )
+        for tool_id in tool_ids:
+            tool_name = rng.choice(TOOLS)
+            success = rng.random() >= failure_rate
+            failed += 0 if success else 1
+            events.append(
+                {"type": "tool.execution_start", "timestamp": tick(1, 20), "data": {"toolCallId": tool_id, "toolName": tool_name}}
+            )
+            events.append(
+                {
+                    "type": "tool.execution_complete",
+                    "timestamp": tick(50, 3_000),
+                    "data": {
+                        "toolCallId": tool_id,
+                        "toolName": tool_name,
+                        "success": success,
+                        "result": {"content": "y" * payload_bytes},
+                    },
+                }
+            )
+
+    validator_id = f"call_{uuid.UUID(int=rng.getrandbits(128)).hex[:12]}"
+    status = "PASS" if validator_pass else "FAIL"
+    requested += 1
+    events.extend(
+        [
+            {
+                "type": "assistant.message",
+                "timestamp": tick(100, 1_000),
+                "data": {"content": "", "toolRequests": [{"toolCallId": validator_id, "name": "task"}]},
+            },
+            {"type": "tool.execution_start", "timestamp": tick(1, 20), "data": {"toolCallId": validator_id, "toolName": "task"}},
+            {
+                "type": "subagent.started",
+                "timestamp": tick(1, 20),
+                "data": {"toolCallId": validator_id, "agentName": "translation-validator"},
+            },
+            {
+                "type": "assistant.message",
+                "agentId": validator_id,
+                "timestamp": tick(1_000, 8_000),
+                "data": {"content": json.dumps({"status": status}, separators=(",", ":")), "toolRequests": []},
+            },
+            {
+                "type": "subagent.completed",
+                "timestamp": tick(10, 100),
+                "data": {"toolCallId": validator_id, "agentName": "translation-validator"},
+            },
+            {
+                "type": "tool.execution_complete",
+                "timestamp": tick(10, 100),
+                "data": {"toolCallId": validator_id, "toolName": "task", "success": True, "result": {"content": "done"}},
+            },
+        ]
+    )
+    task_complete_at = tick(500, 2_000)
+    events.append({"type": "session.task_complete", "timestamp": task_complete_at, "data": {"success": validator_pass}})
+    api_duration = rng.randint(60_000, 300_000)
+    model_metrics = {
+        model: {
+            "requests": {"count": values["count"], "cost": values["count"]},
+            "usage": {
+                "inputTokens": values["inputTokens"],
+                "outputTokens": values["outputTokens"],
+                "cacheReadTokens": values["cacheReadTokens"],
+                "cacheWriteTokens": 0,
+            },
+        }
+        for model, values in usage.items()
+        if values["count"]
+    }
+    events.append(
+        {
+            "type": "session.shutdown",
+            "timestamp": tick(1_000, 10_000),
+            "data": {"totalApiDurationMs": api_duration, "modelMetrics": model_metrics},
+        }
+    )
+
+    with path.open("w", encoding="utf-8") as handle:
+        for event in events:
+            handle.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    expected.update(
+        {
+            "task_complete_success": validator_pass,
+            "shutdown_seen": True,
+            "shutdown_api_duration_ms": api_duration,
+            "shutdown_request_count": sum(values["count"] for values in usage.values()),
+            "shutdown_input_tokens": sum(values["inputTokens"] for values in usage.values()),
+            "shutdown_output_tokens": sum(values["outputTokens"] for values in usage.values()),
+            "events_tool_calls": requested,
+            "events_failed_tool_calls": failed,
+            "events_failed_task_tools": failed_tasks,
+            "translation_validator_invocations": 1,
+            "translation_validator_passes": 1 if validator_pass else 0,
+            "translation_validator_failures": 0 if validator_pass else 1,
+        }
+    )
+
+
+def generate_run(run_dir, rng, args):
+    started = datetime(2026, 4, 30, tzinfo=timezone.utc) + timedelta(seconds=rng.randint(0, 86_400))
+    turns = max(1, args.turns + rng.randint(-2, 2))
+    validator_pass = rng.random() >= args.fail_rate
+    duration = rng.randint(60, 400)
+    expected = {"duration_seconds": float(duration)}
+
+    home = run_dir / "copilot-home"
+    session_dir = home / "session-state" / str(uuid.UUID(int=rng.getrandbits(128)))
+    (home / "logs").mkdir(parents=True, exist_ok=True)
+    session_dir.mkdir(parents=True, exist_ok=True)
+
+    (run_dir / "prompt.txt").write_text("直接呼叫 Notion MCP 讀取最新版本並寫入兩個檔案。\n" * 8, encoding="utf-8")
+    write_process_log(
+        home / "logs" / f"process-{started:%Y%m%d%H%M%S}-{rng.randint(1000, 99999)}.log",
+        rng,
+        started,
+        turns,
+        args.log_lines,
+        expected,
+    )
+    write_events(
+        session_dir / "events.jsonl",
+        rng,
+        started,
+        turns,
+        args.tool_calls,
+        args.tool_failure_rate,
+        args.payload_bytes,
+        validator_pass,
+        expected,
+    )
+    status = "PASS" if validator_pass else "FAIL"
+    (run_dir / "status.env").write_text(
+        "\n".join(
+            [
+                "exit_code=0",
+                "prompt_mode=i",
+                "validation=PASS",
+                f"validator={status}",
+                f"effective={status}",
+                "completion=task_complete",
+                "killed_after_task_complete=1",
+                "version=2.9",
+                f"duration_seconds={duration}",
+                "",
+            ]
+        ),
+        encoding="utf-8",
+    )
+    expected["effective"] = status
+    (run_dir / "expected.json").write_text(json.dumps(expected, indent=2) + "\n", encoding="utf-8")
+
+
+def generate_tree(root, runs, args):
+    rng = random.Random(args.seed)
+    root.mkdir(parents=True, exist_ok=True)
+    for index in range(1, runs + 1):
+        generate_run(root / f"run.{index:05d}", rng, args)
+
+
+def verify_tree(root):
+    mismatches = 0
+    for run_dir in analyze_copilot_logs.find_run_dirs(root):
+        expected = json.loads((run_dir / "expected.json").read_text(encoding="utf-8"))
+        row = analyze_copilot_logs.collect_run(run_dir)
+        for field in EXPECTED_FIELDS:
+            if row.get(field) != expected.get(field):
+                mismatches += 1
+                print(f"[MISMATCH] {run_dir.name} {field}: expected={expected.get(field)!r} actual={row.get(field)!r}")
+    return mismatches
+
+
+def max_rss_bytes(rusage):
+    return rusage.ru_maxrss if sys.platform == "darwin" else rusage.ru_maxrss * 1024
+
+
+def time_full_analysis(root, extra_args):
+    command = [sys.executable, str(ANALYZER), str(root), "--json-out", os.devnull] + extra_args
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    _pid, status, rusage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - started
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"Analyzer failed: {' '.join(command)}")
+    return elapsed, max_rss_bytes(rusage)
+
+
+def time_collect_run(root, samples):
+    run_dirs = analyze_copilot_logs.find_run_dirs(root)[:samples]
+    timings = []
+    for run_dir in run_dirs:
+        started = time.perf_counter()
+        analyze_copilot_logs.collect_run(run_dir)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def bench(args):
+    sizes = [int(value) for value in args.sizes.split(",") if value.strip()]
+    work_root = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix="copilot-log-bench-"))
+    results = []
+    try:
+        for size in sizes:
+            root = work_root / f"runs-{size}"
+            if not root.exists():
+                started = time.perf_counter()
+                generate_tree(root, size, args)
+                print(f"[INFO] Generated {size} runs in {time.perf_counter() - started:.1f}s: {root}", flush=True)
+            if args.verify:
+                mismatches = verify_tree(root)
+                if mismatches:
+                    raise SystemExit(f"[ERROR] {mismatches} metric mismatches under {root}")
+            collect_timings = time_collect_run(root, args.collect_samples)
+            full_seconds, peak_rss = time_full_analysis(root, [])
+            summary_seconds, summary_rss = time_full_analysis(root, ["--summary-only"])
+            result = {
+                "runs": size,
+                "collect_run_ms_p50": round(analyze_copilot_logs.percentile(collect_timings, 0.5) * 1000, 3),
+                "collect_run_ms_p90": round(analyze_copilot_logs.percentile(collect_timings, 0.9) * 1000, 3),
+                "full_analysis_seconds": round(full_seconds, 3),
+                "full_analysis_peak_rss_mb": round(peak_rss / 1024 / 1024, 1),
+                "summary_only_seconds": round(summary_seconds, 3),
+                "summary_only_peak_rss_mb": round(summary_rss / 1024 / 1024, 1),
+            }
+            results.append(result)
+            print(json.dumps(result), flush=True)
+    finally:
+        if not args.work_dir and not args.keep:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+
+def add_fixture_args(parser):
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generated runs.")
+    parser.add_argument("--turns", type=int, default=10, help="Average model requests per run.")
+    parser.add_argument("--tool-calls", type=int, default=12, help="Tool calls per run besides the validator.")
+    parser.add_argument("--tool-failure-rate", type=float, default=0.1, help="Fraction of failed tool calls.")
+    parser.add_argument("--fail-rate", type=float, default=0.2, help="Fraction of runs whose validator fails.")
+    parser.add_argument("--log-lines", type=int, default=5000, help="Lines per process log.")
+    parser.add_argument("--payload-bytes", type=int, default=512, help="Content bytes per assistant/tool event.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic Copilot run trees and benchmark or verify analyze_copilot_logs.py."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = subparsers.add_parser("generate", help="Write run.* fixtures with expected.json per run.")
+    generate_parser.add_argument("root")
+    generate_parser.add_argument("--runs", type=int, default=10)
+    add_fixture_args(generate_parser)
+
+    verify_parser = subparsers.add_parser("verify", help="Check collect_run() against each run's expected.json.")
+    verify_parser.add_argument("root")
+
+    bench_parser = subparsers.add_parser("bench", help="Time collect_run and full-root analysis at several sizes.")
+    bench_parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma-separated run counts (default: {DEFAULT_SIZES}).")
+    bench_parser.add_argument("--work-dir", help="Reuse or keep generated trees here instead of a temp directory.")
+    bench_parser.add_argument("--keep", action="store_true", help="Keep the temporary trees after the benchmark.")
+    bench_parser.add_argument("--collect-samples", type=int, default=50, help="Runs to time collect_run() on.")
+    bench_parser.add_argument("--verify", action="store_true", help="Verify metrics before timing each size.")
+    bench_parser.add_argument("--json-out")
+    add_fixture_args(bench_parser)
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        generate_tree(Path(args.root), args.runs, args)
+        print(f"[INFO] Generated {args.runs} runs under {args.root}")
+    elif args.command == "verify":
+        mismatches = verify_tree(Path(args.root))
+        if mismatches:
+            raise SystemExit(f"[ERROR] {mismatches} metric mismatches")
+        print("[INFO] All runs match expected.json")
+    else:
+        bench(args)
+
+
+if __name__ == "__main__":
+    main()
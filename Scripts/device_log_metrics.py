@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import gzip
+import json
+import math
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_CONFIG = Path(__file__).resolve().with_name("device_log_metrics.json")
+DEFAULT_TOLERANCE = 0.1
+METRICS_DIR_NAME = "metrics"
+STATS = ("count", "first", "last", "min", "max", "mean", "p50", "p95")
+UNIT_SCALES = {("s", "ms"): 1000.0, ("ms", "s"): 0.001}
+SYSLOG_TS_RE = re.compile(r"^(?P<ts>[A-Z][a-z]{2}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}(?:\.\d+)?)\s")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Extract on-device performance time series from run_ios_device_debug.py device logs."
+    )
+    parser.add_argument("runs", nargs="+", help="Run directories (a fan-out run expands to its device runs).")
+    parser.add_argument(
+        "--config",
+        default=str(DEFAULT_CONFIG),
+        help="JSON file with extraction rules (default: device_log_metrics.json next to this script).",
+    )
+    parser.add_argument("--baseline", help="Run directory to compare against; regressions exit with status 1.")
+    parser.add_argument("--json", action="store_true", help="Print the summaries as JSON instead of a table.")
+    return parser.parse_args()
+
+
+def load_config(path):
+    config = json.loads(Path(path).read_text(encoding="utf-8"))
+    rules = []
+    for rule in config.get("rules", []):
+        try:
+            pattern = re.compile(rule["pattern"])
+        except (KeyError, re.error) as exc:
+            raise SystemExit(f"[ERROR] Bad rule {rule.get('name')!r} in {path}: {exc}") from exc
+        rules.append({**rule, "regex": pattern})
+    return {"tolerance": config.get("tolerance", DEFAULT_TOLERANCE), "rules": rules}
+
+
+def metric_rules(config):
+    metrics = {}
+    for rule in config["rules"]:
+        metrics[rule["name"]] = {
+            "unit": rule.get("unit", ""),
+            "stat": rule.get("stat", "mean"),
+            "better": rule.get("better"),
+        }
+        if rule.get("rate"):
+            metrics[rule["rate"]] = {
+                "unit": f"{rule.get('unit', '')}/s",
+                "stat": rule.get("rate_stat", "mean"),
+                "better": rule.get("rate_better", "higher"),
+            }
+    return metrics
+
+
+def expand_runs(paths):
+    runs = []
+    for raw in paths:
+        path = Path(raw).expanduser().resolve()
+        if (path / "device_logs" / "index.json").exists() or (path / "device.log").exists():
+            runs.append(path)
+            continue
+        children = sorted(child for child in path.iterdir() if (child / "device.log").exists()) if path.is_dir() else []
+        if not children:
+            raise SystemExit(f"[ERROR] No device logs under {path}")
+        runs.extend(children)
+    return runs
+
+
+def structured_records(run_dir):
+    directory = run_dir / "device_logs"
+    index_path = directory / "index.json"
+    if not index_path.exists():
+        return None
+    index = json.loads(index_path.read_text(encoding="utf-8"))
+
+    def generate():
+        for segment in index.get("segments", []):
+            path = directory / segment["file"]
+            opener = gzip.open if path.suffix == ".gz" else open
+            with opener(path, "rt", encoding="utf-8") as handle:
+                for raw in handle:
+                    record = json.loads(raw)
+                    yield record["t"], record.get("process"), record.get("message") or ""
+
+    return generate()
+
+
+def text_records(run_dir):
+    year = datetime.fromtimestamp((run_dir / "device.log").stat().st_mtime).year
+    with (run_dir / "device.log").open(encoding="utf-8", errors="replace") as handle:
+        for line in handle:
+            match = SYSLOG_TS_RE.match(line)
+            if not match:
+                continue
+            stamp = " ".join(match.group("ts").split())
+            fmt = "%Y %b %d %H:%M:%S.%f" if "." in stamp else "%Y %b %d %H:%M:%S"
+            try:
+                moment = datetime.strptime(f"{year} {stamp}", fmt)
+            except ValueError:
+                continue
+            yield moment.timestamp(), None, line.rstrip("\n")
+
+
+def log_records(run_dir):
+    records = structured_records(run_dir)
+    return records if records is not None else text_records(run_dir)
+
+
+def rule_value(rule, match):
+    groups = match.groupdict()
+    if groups.get("value") is None:
+        return 1.0
+    value = float(groups["value"])
+    scale = UNIT_SCALES.get((groups.get("unit"), rule.get("unit")))
+    return value * scale if scale else value
+
+
+def extract_series(records, config):
+    series = []
+    previous = {}
+    started = None
+    for t, process, message in records:
+        if started is None:
+            started = t
+        for rule in config["rules"]:
+            if rule.get("process") and process and process != rule["process"]:
+                continue
+            match = rule["regex"].search(message)
+            if not match:
+                continue
+            value = rule_value(rule, match)
+            offset = round(t - started, 6)
+            series.append((offset, rule["name"], value))
+            if rule.get("rate"):
+                last = previous.get(rule["name"])
+                if last is not None and offset > last[0]:
+                    series.append((offset, rule["rate"], (value - last[1]) / (offset - last[0])))
+                previous[rule["name"]] = (offset, value)
+    return series
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * q
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(series, metrics):
+    values = {name: [] for name in metrics}
+    for _offset, name, value in series:
+        values.setdefault(name, []).append(value)
+    summary = {}
+    for name, samples in values.items():
+        entry = {"unit": metrics.get(name, {}).get("unit", ""), "count": len(samples)}
+        if samples:
+            entry.update(
+                {
+                    "first": samples[0],
+                    "last": samples[-1],
+                    "min": min(samples),
+                    "max": max(samples),
+                    "mean": sum(samples) / len(samples),
+                    "p50": percentile(samples, 0.5),
+                    "p95": percentile(samples, 0.95),
+                }
+            )
+        summary[name] = entry
+    return summary
+
+
+def write_outputs(run_dir, series, summary):
+    directory = run_dir / METRICS_DIR_NAME
+    directory.mkdir(parents=True, exist_ok=True)
+    with (directory / "series.csv").open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["t", "metric", "value"])
+        writer.writerows(series)
+    (directory / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    with (directory / "summary.csv").open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["metric", "unit", *STATS])
+        for name, entry in summary.items():
+            writer.writerow([name, entry["unit"], *(entry.get(stat, "") for stat in STATS)])
+
+
+def extract_run(run_dir, config):
+    series = extract_series(log_records(run_dir), config)
+    summary = summarize(series, metric_rules(config))
+    write_outputs(run_dir, series, summary)
+    return summary
+
+
+def load_or_extract(run_dir, config):
+    summary_path = run_dir / METRICS_DIR_NAME / "summary.json"
+    if summary_path.exists():
+        return json.loads(summary_path.read_text(encoding="utf-8"))
+    return extract_run(run_dir, config)
+
+
+def compare_summaries(current, baseline, config):
+    rows = []
+    for name, rule in metric_rules(config).items():
+        stat = rule["stat"]
+        now = (current.get(name) or {}).get(stat)
+        before = (baseline.get(name) or {}).get(stat)
+        if stat == "count":
+            now = now or 0
+            before = before or 0
+        if now is None or before is None:
+            status = "n/a"
+            change = None
+        else:
+            change = (now - before) / abs(before) if before else (0.0 if now == before else math.inf)
+            worse = change < 0 if rule["better"] == "higher" else change > 0
+            if rule["better"] in ("higher", "lower") and worse and abs(change) > config["tolerance"]:
+                status = "REGRESSION"
+            elif rule["better"] in ("higher", "lower") and not worse and abs(change) > config["tolerance"]:
+                status = "improved"
+            else:
+                status = "ok"
+        rows.append({"metric": name, "stat": stat, "baseline": before, "current": now, "change": change, "status": status})
+    return rows
+
+
+def format_value(value):
+    if value is None:
+        return "n/a"
+    if isinstance(value, float) and not value.is_integer():
+        return f"{value:.3f}"
+    return str(int(value))
+
+
+def print_summary(run_dir, summary):
+    print(f"[INFO] {run_dir}")
+    for name, entry in summary.items():
+        if not entry["count"]:
+            continue
+        print(
+            f"  {name:<32} n={entry['count']:<5} mean={format_value(entry['mean'])} "
+            f"p50={format_value(entry['p50'])} p95={format_value(entry['p95'])} "
+            f"max={format_value(entry['max'])} {entry['unit']}"
+        )
+
+
+def print_comparison(rows):
+    print(f"  {'metric':<32} {'stat':<5} {'baseline':>14} {'current':>14} {'change':>9}  status")
+    for row in rows:
+        change = "n/a" if row["change"] is None else f"{row['change'] * 100:+.1f}%"
+        print(
+            f"  {row['metric']:<32} {row['stat']:<5} {format_value(row['baseline']):>14} "
+            f"{format_value(row['current']):>14} {change:>9}  {row['status']}"
+        )
+
+
+def main():
+    args = parse_args()
+    config = load_config(args.config)
+    baseline = None
+    if args.baseline:
+        baseline_runs = expand_runs([args.baseline])
+        if len(baseline_runs) != 1:
+            raise SystemExit("[ERROR] --baseline must point at a single device run.")
+        baseline = load_or_extract(baseline_runs[0], config)
+
+    report = []
+    regressions = 0
+    for run_dir in expand_runs(args.runs):
+        summary = extract_run(run_dir, config)
+        entry = {"run": str(run_dir), "summary": summary}
+        if baseline is not None:
+            entry["compare"] = compare_summaries(summary, baseline, config)
+            regressions += sum(row["status"] == "REGRESSION" for row in entry["compare"])
+        report.append(entry)
+        if not args.json:
+            print_summary(run_dir, summary)
+            if baseline is not None:
+                print_comparison(entry["compare"])
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if regressions:
+        print(f"[ERROR] {regressions} metric regression(s) against {args.baseline}", file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,22 @@
 #!/usr/bin/env python3
 
 import argparse
+import fcntl
+import gzip
+import hashlib
 import json
+import os
+import re
+import shutil
 import signal
 import subprocess
 import sys
 import tempfile
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
 
 
@@ -18,6 +27,32 @@ DEFAULT_PROCESS_NAME = "eisonAI"
 DEFAULT_OUTPUT_ROOT = Path("logs/ios_device_runs")
 DEFAULT_LOG_SECONDS = 30
 DEFAULT_LAUNCH_LOG_GRACE_SECONDS = 3
+SHARED_DERIVED_DATA_NAME = "DerivedData"
+BUILD_CACHE_NAME = "build_cache.json"
+DEVICE_CACHE_NAME = "device_cache.json"
+STORE_DIR_NAME = "store"
+RUN_INDEX_NAME = "runs_index.json"
+RUN_SLUG_RE = re.compile(r"^\d{8}-\d{6}$")
+DEFAULT_DEVICE_CACHE_TTL = 60
+DEFAULT_BUILD_DESTINATION = "generic/platform=iOS"
+DEFAULT_STREAM_READY_TIMEOUT = 5
+INSTALL_MANIFEST_DIR = "installed"
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_SEGMENT_MB = 16
+DEFAULT_MARKER_TIMEOUT = 30
+DEFAULT_MAX_CAPTURE_SECONDS = 600
+CAPTURE_EXIT_CODES = {"marker": 0, "idle": 3, "max-seconds": 4}
+BENCHMARK_METRICS = ["launchReturnMs", "firstLogMs"]
+SYSLOG_LINE_RE = re.compile(
+    r"^(?P<ts>[A-Z][a-z]{2}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}(?:\.\d+)?)\s+"
+    r"(?P<device>\S+)\s+"
+    r"(?P<process>[^\s\[(]+)(?:\((?P<subsystem>[^)]*)\))?\[(?P<pid>\d+)\]\s+"
+    r"<(?P<level>[A-Za-z]+)>:\s?(?P<message>.*)$"
+)
+CHILD_STOP_TIMEOUT = 10
+ACTIVE_CHILDREN = set()
+ACTIVE_CHILDREN_LOCK = threading.Lock()
+FINGERPRINT_EXCLUDED_DIRS = {".git", "DerivedData", "build", "xcuserdata", "__pycache__", ".build", ".swiftpm"}
 
 
 def parse_args():
@@ -29,6 +64,13 @@ def parse_args():
         "--device",
         help="Device name, UDID, identifier, serial number, or ECID. Defaults to the only connected iPhone.",
     )
+    parser.add_argument(
+        "--devices",
+        help=(
+            "Fan out to several devices: 'all' or a comma-separated list of selectors. Builds once, then installs, "
+            "launches and captures logs on every device concurrently."
+        ),
+    )
     parser.add_argument(
         "--scheme",
         default=DEFAULT_SCHEME,
@@ -67,16 +109,115 @@ def parse_args():
             "Use 0 to capture launch logs only."
         ),
     )
+    parser.add_argument(
+        "--until",
+        metavar="REGEX",
+        help="Stop capturing as soon as a log line after launch matches REGEX (exit 0).",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        metavar="SECONDS",
+        help="Stop capturing once no log line has arrived for SECONDS (exit 3).",
+    )
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        help=(
+            "Hard cap on capture time; requires --until or --idle-timeout (exit 4; default: "
+            f"{DEFAULT_MAX_CAPTURE_SECONDS}, unlimited with --stay-attached). "
+            "Use --log-seconds for a fixed capture window."
+        ),
+    )
     parser.add_argument(
         "--stay-attached",
         action="store_true",
         help="Keep streaming app logs until interrupted.",
     )
+    parser.add_argument(
+        "--extract-metrics",
+        action="store_true",
+        help="Run device_log_metrics.py on each captured log and write <run>/metrics/.",
+    )
+    parser.add_argument(
+        "--metrics-config",
+        help="Extraction rules for --extract-metrics (default: Scripts/device_log_metrics.json).",
+    )
+    parser.add_argument(
+        "--metrics-baseline",
+        help="Device run directory to compare extracted metrics against (implies --extract-metrics).",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        help="Benchmark mode: launch the app N times and record launch and startup latency to benchmark.json.",
+    )
+    parser.add_argument(
+        "--launch-mode",
+        choices=("cold", "warm"),
+        default="cold",
+        help="Benchmark launches terminate the running app first (cold) or relaunch it while running (warm).",
+    )
+    parser.add_argument(
+        "--marker",
+        action="append",
+        default=[],
+        metavar="NAME=REGEX",
+        help="Benchmark marker: record when a log line matching REGEX first appears after each launch. Repeatable.",
+    )
+    parser.add_argument(
+        "--marker-timeout",
+        type=float,
+        default=DEFAULT_MARKER_TIMEOUT,
+        help=f"Seconds to wait for the first log line and all markers per launch (default: {DEFAULT_MARKER_TIMEOUT}).",
+    )
     parser.add_argument(
         "--skip-build",
         action="store_true",
         help="Skip xcodebuild and reuse an existing .app from --app-path or the newest one under --output-root.",
     )
+    parser.add_argument(
+        "--build-destination",
+        default=DEFAULT_BUILD_DESTINATION,
+        help=(
+            f"xcodebuild -destination (default: {DEFAULT_BUILD_DESTINATION}, which lets the build overlap device "
+            "discovery). Earlier versions always built for the selected device's id; use 'device' to keep "
+            "doing that, e.g. when the scheme relies on the connected device's OS or architecture."
+        ),
+    )
+    parser.add_argument(
+        "--device-cache-ttl",
+        type=float,
+        default=DEFAULT_DEVICE_CACHE_TTL,
+        help=f"Reuse the devicectl device list for this many seconds (default: {DEFAULT_DEVICE_CACHE_TTL}; 0 disables).",
+    )
+    parser.add_argument(
+        "--derived-data",
+        help=(
+            "Shared DerivedData directory reused across runs (default: <output-root>/DerivedData). "
+            "Concurrent runs wait on a lock next to it."
+        ),
+    )
+    parser.add_argument(
+        "--fresh-derived-data",
+        action="store_true",
+        help="Build into a fresh per-run DerivedData directory instead of the shared one.",
+    )
+    parser.add_argument(
+        "--force-build",
+        action="store_true",
+        help="Run xcodebuild even when the source fingerprint matches the last successful build.",
+    )
+    parser.add_argument(
+        "--build-timing",
+        action="store_true",
+        help="Pass -showBuildTimingSummary and report the slowest phases, targets and files from build.log.",
+    )
+    parser.add_argument(
+        "--time-function-bodies",
+        action="store_true",
+        help="Also compile with -Xfrontend -debug-time-function-bodies (implies --build-timing; slower builds).",
+    )
     parser.add_argument(
         "--app-path",
         help="Path to an existing .app bundle. Useful together with --skip-build.",
@@ -86,11 +227,42 @@ def parse_args():
         action="store_true",
         help="Skip app installation and only launch/log.",
     )
+    parser.add_argument(
+        "--force-install",
+        action="store_true",
+        help="Install even when the bundle matches the one last installed on the device.",
+    )
     parser.add_argument(
         "--echo-logs",
         action="store_true",
         help="Mirror device log lines to stdout while writing them to file.",
     )
+    parser.add_argument(
+        "--flush-interval",
+        type=float,
+        default=DEFAULT_FLUSH_INTERVAL,
+        help=f"Seconds between flushes of captured logs (default: {DEFAULT_FLUSH_INTERVAL}).",
+    )
+    parser.add_argument(
+        "--segment-mb",
+        type=float,
+        default=DEFAULT_SEGMENT_MB,
+        help=f"Rotate structured log segments after this many MB (default: {DEFAULT_SEGMENT_MB}).",
+    )
+    parser.add_argument(
+        "--compress-segments",
+        action="store_true",
+        help="Gzip the structured device_logs/*.jsonl segments.",
+    )
+    parser.add_argument(
+        "--slice-logs",
+        metavar="RUN_ROOT",
+        help="Print structured log records from a previous run's device_logs/ and exit. Combine with --slice-* filters.",
+    )
+    parser.add_argument("--slice-since", help="Only records received at or after this ISO time (with --slice-logs).")
+    parser.add_argument("--slice-until", help="Only records received before this ISO time (with --slice-logs).")
+    parser.add_argument("--slice-subsystem", help="Only records from this subsystem (with --slice-logs).")
+    parser.add_argument("--slice-level", help="Only records with this level, e.g. Error (with --slice-logs).")
     parser.add_argument(
         "--list-devices",
         action="store_true",
@@ -128,7 +300,9 @@ def run_paths(output_root, slug):
         "launch_json": run_root / "launch.json",
         "launch_log": run_root / "launch.log",
         "launch_payload": run_root / "launch_payload.json",
+        "benchmark": run_root / "benchmark.json",
         "device_log": run_root / "device.log",
+        "device_segments": run_root / "device_logs",
         "metadata": run_root / "run_metadata.json",
         "derived_data": run_root / "DerivedData",
     }
@@ -137,6 +311,7 @@ def run_paths(output_root, slug):
 def run_logged(command, log_path, cwd):
     print(f"[RUN] {' '.join(command)}")
     with log_path.open("w", encoding="utf-8") as log_file:
+        # Own process group, so terminate_children() also stops the compilers it spawns.
         process = subprocess.Popen(
             command,
             cwd=cwd,
@@ -144,16 +319,40 @@ def run_logged(command, log_path, cwd):
             stderr=subprocess.STDOUT,
             text=True,
             bufsize=1,
+            start_new_session=True,
         )
-        assert process.stdout is not None
-        for line in process.stdout:
-            sys.stdout.write(line)
-            log_file.write(line)
-        return_code = process.wait()
+        with ACTIVE_CHILDREN_LOCK:
+            ACTIVE_CHILDREN.add(process)
+        try:
+            assert process.stdout is not None
+            for line in process.stdout:
+                sys.stdout.write(line)
+                log_file.write(line)
+            return_code = process.wait()
+        finally:
+            with ACTIVE_CHILDREN_LOCK:
+                ACTIVE_CHILDREN.discard(process)
     if return_code != 0:
         raise RuntimeError(f"Command failed with exit code {return_code}: {' '.join(command)}")
 
 
+def terminate_children():
+    with ACTIVE_CHILDREN_LOCK:
+        children = [process for process in ACTIVE_CHILDREN if process.poll() is None]
+    for process in children:
+        print(f"[INFO] Stopping {Path(process.args[0]).name} (pid {process.pid})")
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    for process in children:
+        try:
+            process.wait(timeout=CHILD_STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+
+
 def load_devices():
     with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as handle:
         json_path = Path(handle.name)
@@ -200,18 +399,30 @@ def device_is_eligible(entry):
     return True
 
 
-def connected_ios_devices():
+def load_devices_cached(cache_path, ttl):
+    if ttl > 0:
+        cache = load_json_file(cache_path)
+        if cache and time.time() - cache.get("savedAt", 0) <= ttl:
+            return cache.get("devices", []), True
+    devices = load_devices()
+    if ttl > 0:
+        ensure_dir(cache_path.parent)
+        write_json_file(cache_path, {"savedAt": time.time(), "devices": devices})
+    return devices, False
+
+
+def connected_ios_devices(raw_devices=None):
     devices = []
-    for device in load_devices():
+    for device in load_devices() if raw_devices is None else raw_devices:
         entry = normalize_device(device)
         if device_is_eligible(entry):
             devices.append(entry)
     return devices
 
 
-def all_ios_devices():
+def all_ios_devices(raw_devices=None):
     devices = []
-    for device in load_devices():
+    for device in load_devices() if raw_devices is None else raw_devices:
         entry = normalize_device(device)
         if entry["deviceType"] in {"iPhone", "iPad"}:
             devices.append(entry)
@@ -231,8 +442,10 @@ def format_device_error(prefix, devices):
     return "\n".join(lines)
 
 
-def select_device(selector):
-    devices = connected_ios_devices()
+def select_device(selector, raw_devices=None):
+    if raw_devices is None:
+        raw_devices = load_devices()
+    devices = connected_ios_devices(raw_devices)
     if selector:
         selector_lower = selector.lower()
         matches = [
@@ -257,13 +470,60 @@ def select_device(selector):
     if len(devices) == 1:
         return devices[0]
     if not devices:
-        ios_devices = all_ios_devices()
+        ios_devices = all_ios_devices(raw_devices)
         if ios_devices:
             raise SystemExit(format_device_error("No eligible iPhone/iPad device was found.", ios_devices))
         raise SystemExit("[ERROR] No connected iPhone/iPad with Developer Mode enabled was found.")
     raise SystemExit(format_device_error("Multiple connected iPhone/iPad devices found. Pass --device.", devices))
 
 
+def discover_device(args, output_root):
+    raw_devices, from_cache = load_devices_cached(output_root / DEVICE_CACHE_NAME, args.device_cache_ttl)
+    try:
+        return select_device(args.device, raw_devices)
+    except SystemExit:
+        if not from_cache:
+            raise
+    print("[INFO] Cached device list did not match; refreshing.")
+    raw_devices = load_devices()
+    write_json_file(output_root / DEVICE_CACHE_NAME, {"savedAt": time.time(), "devices": raw_devices})
+    return select_device(args.device, raw_devices)
+
+
+def select_devices(selectors, raw_devices):
+    if selectors.strip().lower() == "all":
+        devices = connected_ios_devices(raw_devices)
+        if not devices:
+            raise SystemExit("[ERROR] No connected iPhone/iPad with Developer Mode enabled was found.")
+        return devices
+
+    devices = []
+    for selector in (value.strip() for value in selectors.split(",")):
+        if not selector:
+            continue
+        device = select_device(selector, raw_devices)
+        if all(existing["udid"] != device["udid"] for existing in devices):
+            devices.append(device)
+    if not devices:
+        raise SystemExit("[ERROR] --devices did not name any device.")
+    return devices
+
+
+def discover_devices(args, output_root):
+    if not args.devices:
+        return [discover_device(args, output_root)]
+    raw_devices, from_cache = load_devices_cached(output_root / DEVICE_CACHE_NAME, args.device_cache_ttl)
+    try:
+        return select_devices(args.devices, raw_devices)
+    except SystemExit:
+        if not from_cache:
+            raise
+    print("[INFO] Cached device list did not match; refreshing.")
+    raw_devices = load_devices()
+    write_json_file(output_root / DEVICE_CACHE_NAME, {"savedAt": time.time(), "devices": raw_devices})
+    return select_devices(args.devices, raw_devices)
+
+
 def list_devices_and_exit():
     devices = all_ios_devices()
     if not devices:
@@ -278,28 +538,232 @@ def list_devices_and_exit():
         )
 
 
-def build_app(args, paths, device_udid):
+def source_files(project_dir, excluded):
+    result = subprocess.run(
+        ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+        cwd=project_dir,
+        capture_output=True,
+    )
+    if result.returncode == 0:
+        candidates = [project_dir / name for name in result.stdout.decode("utf-8").split("\0") if name]
+    else:
+        candidates = []
+        for root, dirs, files in os.walk(project_dir):
+            dirs[:] = [name for name in dirs if name not in FINGERPRINT_EXCLUDED_DIRS]
+            candidates.extend(Path(root) / name for name in files)
+
+    for path in candidates:
+        if any(part in FINGERPRINT_EXCLUDED_DIRS for part in path.relative_to(project_dir).parts):
+            continue
+        if any(path.is_relative_to(root) for root in excluded):
+            continue
+        if path.is_file():
+            yield path
+
+
+def source_tree_hash(project_dir, excluded):
+    digest = hashlib.sha256()
+    for path in sorted(source_files(project_dir, excluded)):
+        file_digest = hashlib.sha256()
+        with path.open("rb") as handle:
+            for block in iter(lambda: handle.read(1024 * 1024), b""):
+                file_digest.update(block)
+        digest.update(path.relative_to(project_dir).as_posix().encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(file_digest.digest())
+    return digest.hexdigest()
+
+
+def extra_build_arguments(args):
+    extra = []
+    if args.build_timing or args.time_function_bodies:
+        extra.append("-showBuildTimingSummary")
+    if args.time_function_bodies:
+        extra.append("OTHER_SWIFT_FLAGS=$(inherited) -Xfrontend -debug-time-function-bodies")
+    return extra
+
+
+def build_fingerprint(args, destination, excluded):
+    project_path = Path(args.project).resolve()
+    payload = {
+        "tree": source_tree_hash(project_path.parent, excluded),
+        "project": str(project_path),
+        "scheme": args.scheme,
+        "destination": destination,
+        # Timing flags change what xcodebuild reports and how it compiles, so
+        # a timed build is never satisfied by (or reused for) a plain one.
+        "extraArguments": extra_build_arguments(args),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_json_file(path):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_json_file(path, payload):
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+    temporary.replace(path)
+
+
+@contextmanager
+def exclusive_lock(path, waiting_message=None):
+    ensure_dir(path.parent)
+    lock_path = path.with_name(f"{path.name}.lock")
+    with lock_path.open("w") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            if waiting_message:
+                print(waiting_message)
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def derived_data_lock(derived_data):
+    return exclusive_lock(derived_data, f"[INFO] Waiting for another build using {derived_data}")
+
+
+def store_object(store, digest, source):
+    target = store / "objects" / digest[:2] / digest
+    if not target.exists():
+        ensure_dir(target.parent)
+        temporary = target.with_name(f".{digest}.{os.getpid()}.tmp")
+        shutil.copy2(source, temporary)
+        temporary.replace(target)
+    return target
+
+
+def store_app(app_path, output_root):
+    store = output_root / STORE_DIR_NAME
+    root_hash, files = merkle_hash(app_path)
+    target = store / "apps" / root_hash / app_path.name
+    if target.exists():
+        return target
+
+    staging = store / "apps" / f".{root_hash}.{os.getpid()}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    bundle = staging / app_path.name
+    ensure_dir(bundle)
+    for root, dirs, names in os.walk(app_path):
+        root = Path(root)
+        destination = bundle / root.relative_to(app_path)
+        for name in dirs + names:
+            source = root / name
+            if source.is_symlink():
+                os.symlink(os.readlink(source), destination / name)
+                if name in dirs:
+                    dirs.remove(name)
+            elif source.is_dir():
+                ensure_dir(destination / name)
+            else:
+                relative = source.relative_to(app_path).as_posix()
+                os.link(store_object(store, files[relative], source), destination / name)
+    try:
+        staging.rename(target.parent)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        if not target.exists():
+            raise
+    return target
+
+
+def store_app_hash(app_path, output_root):
+    try:
+        relative = Path(app_path).relative_to(output_root / STORE_DIR_NAME / "apps")
+    except ValueError:
+        return None
+    return relative.parts[0] if relative.parts else None
+
+
+def register_run(output_root, slug, app_path):
+    index_path = output_root / RUN_INDEX_NAME
+    with exclusive_lock(index_path):
+        index = load_json_file(index_path)
+        runs = index.setdefault("runs", {})
+        runs[slug] = {
+            "startedAt": time.time(),
+            "appPath": str(app_path) if app_path else None,
+            "appHash": store_app_hash(app_path, output_root) if app_path else None,
+        }
+        if app_path:
+            index["latestApp"] = str(app_path)
+        write_json_file(index_path, index)
+
+
+def build_app(args, paths, destination):
     derived_data = paths["derived_data"]
     build_log = paths["build_log"]
-    command = [
-        "xcodebuild",
-        "-project",
-        args.project,
-        "-scheme",
-        args.scheme,
-        "-destination",
-        f"id={device_udid}",
-        "-derivedDataPath",
-        str(derived_data),
-        "build",
-    ]
-    run_logged(command, build_log, cwd=Path(args.project).resolve().parent)
-    apps = sorted((derived_data / "Build" / "Products").glob("*-iphoneos/*.app"))
-    if len(apps) != 1:
-        raise RuntimeError(
-            f"Expected exactly one built .app, found {len(apps)} in {derived_data / 'Build' / 'Products'}"
+    output_root = paths["run_root"].parent
+    cache_path = output_root / BUILD_CACHE_NAME
+
+    with derived_data_lock(derived_data):
+        fingerprint = build_fingerprint(args, destination, [output_root, derived_data])
+        cache = load_json_file(cache_path)
+        cached_app = Path(cache["appPath"]) if cache.get("appPath") else None
+        if (
+            not args.force_build
+            and cache.get("fingerprint") == fingerprint
+            and cached_app is not None
+            and cached_app.exists()
+        ):
+            print(f"[INFO] Sources unchanged since last build; reusing {cached_app}")
+            if store_app_hash(cached_app, output_root) is None:
+                cached_app = store_app(cached_app, output_root)
+            build_log.write_text(f"# build skipped: fingerprint {fingerprint} matches {cached_app}\n", encoding="utf-8")
+            if args.build_timing or args.time_function_bodies:
+                print("[INFO] No build timing for a reused build; pass --force-build to time a rebuild.")
+            return cached_app
+
+        command = [
+            "xcodebuild",
+            "-project",
+            args.project,
+            "-scheme",
+            args.scheme,
+            "-destination",
+            destination,
+            "-derivedDataPath",
+            str(derived_data),
+        ]
+        command.extend(extra_build_arguments(args))
+        command.append("build")
+        run_logged(command, build_log, cwd=Path(args.project).resolve().parent)
+        if args.build_timing or args.time_function_bodies:
+            report_build_timing(build_log)
+        apps = sorted((derived_data / "Build" / "Products").glob("*-iphoneos/*.app"))
+        if len(apps) != 1:
+            raise RuntimeError(
+                f"Expected exactly one built .app, found {len(apps)} in {derived_data / 'Build' / 'Products'}"
+            )
+        app_path = store_app(apps[0], output_root)
+        write_json_file(
+            cache_path,
+            {
+                "fingerprint": fingerprint,
+                "appPath": str(app_path),
+                "destination": destination,
+                "builtAt": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            },
         )
-    return apps[0]
+        return app_path
+
+
+def report_build_timing(build_log):
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import xcodebuild_timing
+
+    try:
+        xcodebuild_timing.print_report(xcodebuild_timing.analyze(build_log), 10)
+    except (OSError, ValueError) as exc:
+        print(f"[WARN] Could not analyze build timing: {exc}")
 
 
 def locate_existing_app(app_path, output_root):
@@ -309,7 +773,15 @@ def locate_existing_app(app_path, output_root):
             raise RuntimeError(f"Existing app bundle not found: {candidate}")
         return candidate
 
-    apps = list(Path(output_root).expanduser().resolve().glob("*/DerivedData/Build/Products/*-iphoneos/*.app"))
+    output_root = Path(output_root).expanduser().resolve()
+    for candidate in (
+        load_json_file(output_root / RUN_INDEX_NAME).get("latestApp"),
+        load_json_file(output_root / BUILD_CACHE_NAME).get("appPath"),
+    ):
+        if candidate and Path(candidate).exists():
+            return Path(candidate)
+
+    apps = list(output_root.glob("*/DerivedData/Build/Products/*-iphoneos/*.app"))
     if not apps:
         raise RuntimeError("Could not find an existing .app under the output root.")
     return max(apps, key=lambda path: path.stat().st_mtime)
@@ -342,7 +814,88 @@ def install_app(device, app_path, paths, cwd):
     )
 
 
-def launch_app(args, device, paths, cwd):
+def file_digest(path):
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def merkle_hash(directory, prefix="", files=None):
+    if files is None:
+        files = {}
+    digest = hashlib.sha256()
+    for child in sorted(directory.iterdir(), key=lambda path: path.name):
+        relative = f"{prefix}{child.name}"
+        if child.is_symlink():
+            kind = "link"
+            child_hash = hashlib.sha256(os.readlink(child).encode("utf-8")).hexdigest()
+            files[relative] = child_hash
+        elif child.is_dir():
+            kind = "dir"
+            child_hash, _files = merkle_hash(child, f"{relative}/", files)
+        else:
+            kind = "file"
+            child_hash = file_digest(child)
+            files[relative] = child_hash
+        digest.update(f"{kind}\0{child.name}\0{child_hash}\n".encode("utf-8"))
+    return digest.hexdigest(), files
+
+
+def install_manifest_path(output_root, device):
+    return output_root / INSTALL_MANIFEST_DIR / f"{device['udid']}.json"
+
+
+def diff_manifests(previous, current):
+    added = sorted(set(current) - set(previous))
+    removed = sorted(set(previous) - set(current))
+    changed = sorted(name for name in set(current) & set(previous) if current[name] != previous[name])
+    return added, removed, changed
+
+
+def install_app_if_changed(args, device, app_path, paths, cwd, output_root):
+    root_hash, files = merkle_hash(app_path)
+    manifest_path = install_manifest_path(output_root, device)
+    previous = load_json_file(manifest_path)
+
+    if (
+        not args.force_install
+        and previous.get("rootHash") == root_hash
+        and previous.get("bundleID") == args.bundle_id
+    ):
+        print(f"[INFO] {device['name']} already has this bundle ({root_hash[:12]}); skipping install.")
+        paths["install_log"].write_text(f"# install skipped: bundle hash {root_hash} unchanged\n", encoding="utf-8")
+        return None
+
+    if previous.get("files") and previous.get("rootHash") != root_hash:
+        added, removed, changed = diff_manifests(previous["files"], files)
+        print(
+            f"[INFO] Bundle changed since last install: {len(changed)} changed, "
+            f"{len(added)} added, {len(removed)} removed."
+        )
+        for label, names in (("changed", changed), ("added", added), ("removed", removed)):
+            for name in names[:10]:
+                print(f"[INFO]   {label}: {name}")
+            if len(names) > 10:
+                print(f"[INFO]   ... {len(names) - 10} more {label}")
+
+    payload = install_app(device, app_path, paths, cwd)
+    ensure_dir(manifest_path.parent)
+    write_json_file(
+        manifest_path,
+        {
+            "bundleID": args.bundle_id,
+            "rootHash": root_hash,
+            "appPath": str(app_path),
+            "installedAt": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "files": files,
+        },
+    )
+    return payload
+
+
+def launch_app(args, device, paths, cwd, terminate_existing=True):
     command = [
         "xcrun",
         "devicectl",
@@ -351,8 +904,9 @@ def launch_app(args, device, paths, cwd):
         "launch",
         "--device",
         device["udid"],
-        "--terminate-existing",
     ]
+    if terminate_existing:
+        command.append("--terminate-existing")
     if args.payload_url:
         command.extend(["--payload-url", args.payload_url])
     command.append(args.bundle_id)
@@ -364,7 +918,7 @@ def launch_app(args, device, paths, cwd):
     )
 
 
-def record_metadata(paths, args, device, app_path):
+def record_metadata(paths, args, device, app_path, stages=None, capture_end=None):
     metadata = {
         "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
         "device": device,
@@ -374,11 +928,353 @@ def record_metadata(paths, args, device, app_path):
         "payloadURL": args.payload_url,
         "processName": args.process_name,
         "appPath": str(app_path) if app_path else None,
+        "stages": stages or {},
+        "captureEnd": capture_end,
     }
     paths["metadata"].write_text(json.dumps(metadata, indent=2, ensure_ascii=False), encoding="utf-8")
 
 
-def stream_device_logs(args, device, paths):
+def parse_syslog_line(line, received_at):
+    match = SYSLOG_LINE_RE.match(line)
+    if not match:
+        return None
+    return {
+        "t": round(received_at, 6),
+        "ts": match.group("ts"),
+        "device": match.group("device"),
+        "process": match.group("process"),
+        "subsystem": match.group("subsystem"),
+        "pid": int(match.group("pid")),
+        "level": match.group("level"),
+        "message": match.group("message"),
+    }
+
+
+class StructuredLogWriter:
+    def __init__(self, directory, segment_bytes, compress):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.compress = compress
+        self.segments = []
+        self.handle = None
+        self.pending = None
+        ensure_dir(directory)
+
+    def _open_segment(self):
+        name = f"segment-{len(self.segments) + 1:05d}.jsonl" + (".gz" if self.compress else "")
+        path = self.directory / name
+        self.handle = gzip.open(path, "wt", encoding="utf-8") if self.compress else path.open("w", encoding="utf-8")
+        self.segments.append(
+            {"file": name, "records": 0, "bytes": 0, "tFirst": None, "tLast": None, "subsystems": {}, "levels": {}}
+        )
+
+    def _write(self, record):
+        if self.handle is None or self.segments[-1]["bytes"] >= self.segment_bytes:
+            if self.handle is not None:
+                self.handle.close()
+            self._open_segment()
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        self.handle.write(line)
+        segment = self.segments[-1]
+        segment["records"] += 1
+        segment["bytes"] += len(line.encode("utf-8"))
+        if segment["tFirst"] is None:
+            segment["tFirst"] = record["t"]
+        segment["tLast"] = record["t"]
+        subsystem = record.get("subsystem") or ""
+        level = record.get("level") or ""
+        segment["subsystems"][subsystem] = segment["subsystems"].get(subsystem, 0) + 1
+        segment["levels"][level] = segment["levels"].get(level, 0) + 1
+
+    def add_line(self, line, received_at):
+        text = line.rstrip("\n")
+        record = parse_syslog_line(text, received_at)
+        if record is None and self.pending is not None:
+            self.pending["message"] += "\n" + text
+            return
+        if self.pending is not None:
+            self._write(self.pending)
+        self.pending = record or {
+            "t": round(received_at, 6),
+            "ts": None,
+            "device": None,
+            "process": None,
+            "subsystem": None,
+            "pid": None,
+            "level": None,
+            "message": text,
+        }
+
+    def flush(self):
+        if self.handle is not None:
+            self.handle.flush()
+        write_json_file(self.directory / "index.json", {"segments": self.segments})
+
+    def close(self):
+        if self.pending is not None:
+            self._write(self.pending)
+            self.pending = None
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+        write_json_file(self.directory / "index.json", {"segments": self.segments})
+
+
+def parse_slice_time(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def slice_device_logs(run_root, since=None, until=None, subsystem=None, level=None):
+    directory = Path(run_root).expanduser().resolve() / "device_logs"
+    index = load_json_file(directory / "index.json")
+    if not index:
+        raise SystemExit(f"[ERROR] No structured device log index under {directory}")
+    for segment in index.get("segments", []):
+        if not segment["records"]:
+            continue
+        if since is not None and segment["tLast"] < since:
+            continue
+        if until is not None and segment["tFirst"] >= until:
+            continue
+        if subsystem is not None and subsystem not in segment["subsystems"]:
+            continue
+        if level is not None and level not in segment["levels"]:
+            continue
+        path = directory / segment["file"]
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8") as handle:
+            for raw in handle:
+                record = json.loads(raw)
+                if since is not None and record["t"] < since:
+                    continue
+                if until is not None and record["t"] >= until:
+                    continue
+                if subsystem is not None and record.get("subsystem") != subsystem:
+                    continue
+                if level is not None and record.get("level") != level:
+                    continue
+                yield record
+
+
+def print_log_slice(args):
+    for record in slice_device_logs(
+        args.slice_logs,
+        since=parse_slice_time(args.slice_since),
+        until=parse_slice_time(args.slice_until),
+        subsystem=args.slice_subsystem,
+        level=args.slice_level,
+    ):
+        print(json.dumps(record, ensure_ascii=False))
+
+
+def parse_markers(values):
+    markers = []
+    for value in values:
+        name, separator, pattern = value.partition("=")
+        if not separator or not name:
+            raise SystemExit(f"[ERROR] --marker must look like NAME=REGEX: {value}")
+        try:
+            markers.append((name, re.compile(pattern)))
+        except re.error as exc:
+            raise SystemExit(f"[ERROR] Invalid --marker regex for {name}: {exc}") from exc
+    return markers
+
+
+class LaunchProbe:
+    """Times the first app log line and marker hits after each launch.
+
+    Until the launch call returns, a line could still come from the previous
+    instance, so lines are held back. When devicectl reports the new pid,
+    held lines from that pid are counted with their original times; all
+    other held lines are dropped. Lines after the return always count.
+    """
+
+    def __init__(self, process_name, markers):
+        self.process_name = process_name
+        self.markers = markers
+        self.lock = threading.Lock()
+        self.started_at = None
+        self.returned_at = None
+        self.pending = []
+        self.first_log_at = None
+        self.hits = {}
+        self.done = threading.Event()
+
+    def reset(self, started_at):
+        with self.lock:
+            self.started_at = started_at
+            self.returned_at = None
+            self.pending = []
+            self.first_log_at = None
+            self.hits = {}
+            self.done.clear()
+
+    def launched(self, returned_at, pid=None):
+        with self.lock:
+            self.returned_at = returned_at
+            pending, self.pending = self.pending, []
+            if pid is None:
+                return
+            for line, received_at, line_pid in pending:
+                if line_pid == pid:
+                    self._accept(line, received_at, line_pid)
+
+    def __call__(self, line, received_at):
+        with self.lock:
+            if self.started_at is None or received_at < self.started_at:
+                return
+            record = parse_syslog_line(line.rstrip("\n"), received_at)
+            pid = record["pid"] if record is not None and record["process"] == self.process_name else None
+            if self.returned_at is None:
+                self.pending.append((line, received_at, pid))
+                return
+            self._accept(line, received_at, pid)
+
+    def _accept(self, line, received_at, pid):
+        if self.first_log_at is None and pid is not None:
+            self.first_log_at = received_at
+        for name, pattern in self.markers:
+            if name not in self.hits and pattern.search(line):
+                self.hits[name] = received_at
+        if self.first_log_at is not None and len(self.hits) == len(self.markers):
+            self.done.set()
+
+
+class CaptureWatcher:
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.armed = False
+        self.last_line_at = None
+        self.matched_line = None
+        self.matched = threading.Event()
+
+    def arm(self):
+        self.armed = True
+
+    def __call__(self, line, received_at):
+        self.last_line_at = time.monotonic()
+        if self.armed and self.pattern is not None and not self.matched.is_set() and self.pattern.search(line):
+            self.matched_line = line.strip()
+            self.matched.set()
+
+
+def wait_for_capture_end(args, watcher, stop_capture):
+    started = time.monotonic()
+    max_seconds = args.max_seconds
+    if max_seconds is None and not args.stay_attached:
+        max_seconds = DEFAULT_MAX_CAPTURE_SECONDS
+    while True:
+        if watcher.matched.wait(0.1):
+            return "marker"
+        now = time.monotonic()
+        if args.idle_timeout is not None and now - max(watcher.last_line_at or started, started) >= args.idle_timeout:
+            return "idle"
+        if max_seconds is not None and now - started >= max_seconds:
+            return "max-seconds"
+        if stop_capture.is_set():
+            return "interrupted"
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def launched_pid(payload):
+    process = ((payload or {}).get("result") or {}).get("process") or {}
+    pid = process.get("processIdentifier")
+    return pid if isinstance(pid, int) else None
+
+
+def round_ms(value):
+    return None if value is None else round(value, 1)
+
+
+def elapsed_ms(started_at, at):
+    return None if at is None else round((at - started_at) * 1000, 1)
+
+
+def format_ms(value):
+    return "n/a" if value is None else f"{value}ms"
+
+
+def summarize_latencies(iterations, metrics):
+    summary = {}
+    for metric in metrics:
+        values = [item[metric] for item in iterations if item.get(metric) is not None]
+        summary[metric] = {
+            "count": len(values),
+            "p50": round_ms(percentile(values, 0.50)),
+            "p95": round_ms(percentile(values, 0.95)),
+            "min": min(values) if values else None,
+            "max": max(values) if values else None,
+        }
+    return summary
+
+
+def run_launch_benchmark(args, device, paths, cwd, probe):
+    run_root = paths["run_root"]
+    iterations = []
+    if args.launch_mode == "warm":
+        print("[INFO] Priming launch for warm benchmark.")
+        launch_app(args, device, dict(paths, launch_json=run_root / "launch-prime.json", launch_log=run_root / "launch-prime.log"), cwd)
+        time.sleep(DEFAULT_LAUNCH_LOG_GRACE_SECONDS)
+
+    for index in range(1, args.repeat + 1):
+        iteration_paths = dict(
+            paths,
+            launch_json=run_root / f"launch-{index:03d}.json",
+            launch_log=run_root / f"launch-{index:03d}.log",
+        )
+        started_at = time.time()
+        probe.reset(started_at)
+        payload = launch_app(args, device, iteration_paths, cwd, terminate_existing=args.launch_mode == "cold")
+        returned_at = time.time()
+        probe.launched(returned_at, launched_pid(payload))
+        completed = probe.done.wait(args.marker_timeout)
+        with probe.lock:
+            result = {
+                "iteration": index,
+                "mode": args.launch_mode,
+                "launchCommandAt": started_at,
+                "launchReturnMs": elapsed_ms(started_at, returned_at),
+                "firstLogMs": elapsed_ms(started_at, probe.first_log_at),
+                "markers": {name: elapsed_ms(started_at, probe.hits.get(name)) for name, _pattern in probe.markers},
+                "timedOut": not completed,
+            }
+        for name, value in result["markers"].items():
+            result[f"marker:{name}"] = value
+        iterations.append(result)
+        print(
+            f"[BENCH] {index}/{args.repeat} launch={format_ms(result['launchReturnMs'])} "
+            f"firstLog={format_ms(result['firstLogMs'])} "
+            + " ".join(f"{name}={format_ms(value)}" for name, value in result["markers"].items())
+            + (" (timed out)" if not completed else ""),
+            flush=True,
+        )
+
+    metrics = BENCHMARK_METRICS + [f"marker:{name}" for name, _pattern in probe.markers]
+    summary = summarize_latencies(iterations, metrics)
+    write_json_file(
+        paths["benchmark"],
+        {"device": device, "mode": args.launch_mode, "iterations": iterations, "summary": summary},
+    )
+    for metric, stats in summary.items():
+        print(f"[BENCH] {metric}: n={stats['count']} p50={stats['p50']} p95={stats['p95']} min={stats['min']} max={stats['max']}")
+    print(f"[DONE] Benchmark: {paths['benchmark']}")
+
+
+def stream_device_logs(args, device, paths, listeners=()):
     log_path = paths["device_log"]
     log_path.write_text("", encoding="utf-8")
     command = ["idevicesyslog"]
@@ -401,26 +1297,60 @@ def stream_device_logs(args, device, paths):
         bufsize=1,
     )
     stop_event = threading.Event()
+    ready_event = threading.Event()
+    done_event = threading.Event()
+    write_lock = threading.Lock()
+    log_file = log_path.open("w", encoding="utf-8")
+    writer = StructuredLogWriter(
+        paths["device_segments"],
+        int(args.segment_mb * 1024 * 1024),
+        args.compress_segments,
+    )
+    log_file.write(
+        f"# device={device['name']} udid={device['udid']} process={args.process_name} started_at={time.strftime('%Y-%m-%dT%H:%M:%S%z')}\n"
+    )
+
+    def flush_all():
+        log_file.flush()
+        writer.flush()
+        if args.echo_logs:
+            sys.stdout.flush()
+
+    def flush_periodically():
+        while not done_event.wait(args.flush_interval):
+            with write_lock:
+                flush_all()
 
     def forward():
         assert process.stdout is not None
-        with log_path.open("w", encoding="utf-8") as log_file:
-            log_file.write(
-                f"# device={device['name']} udid={device['udid']} process={args.process_name} started_at={time.strftime('%Y-%m-%dT%H:%M:%S%z')}\n"
-            )
-            log_file.flush()
+        try:
             for line in process.stdout:
-                log_file.write(line)
-                log_file.flush()
-                if args.echo_logs:
-                    sys.stdout.write(line)
-                    sys.stdout.flush()
+                received_at = time.time()
+                ready_event.set()
+                with write_lock:
+                    log_file.write(line)
+                    writer.add_line(line, received_at)
+                    if args.echo_logs:
+                        sys.stdout.write(line)
+                for listener in listeners:
+                    listener(line, received_at)
                 if stop_event.is_set():
                     break
+        finally:
+            # Stop the flusher before closing the files it flushes.
+            done_event.set()
+            flusher.join()
+            with write_lock:
+                writer.close()
+                log_file.close()
+                if args.echo_logs:
+                    sys.stdout.flush()
 
+    flusher = threading.Thread(target=flush_periodically, daemon=True)
+    flusher.start()
     thread = threading.Thread(target=forward, daemon=True)
     thread.start()
-    return process, thread, stop_event
+    return process, thread, stop_event, ready_event
 
 
 def stop_log_stream(process, thread, stop_event):
@@ -434,70 +1364,426 @@ def stop_log_stream(process, thread, stop_event):
     thread.join(timeout=5)
 
 
-def main():
-    ensure_tool("xcodebuild")
-    ensure_tool("xcrun")
-    ensure_tool("idevicesyslog")
-
-    args = parse_args()
-    if args.list_devices:
-        list_devices_and_exit()
-        return
-
-    device = select_device(args.device)
-    project_dir = Path(args.project).resolve().parent
-    output_root = Path(args.output_root).expanduser().resolve()
-    ensure_dir(output_root)
-    run_slug = timestamp_slug()
-    paths = run_paths(output_root, run_slug)
-    ensure_dir(paths["run_root"])
+def timed_stage(stages, name, function, *args):
+    started = time.monotonic()
+    try:
+        return function(*args)
+    finally:
+        stages[name] = round(time.monotonic() - started, 3)
 
-    print(
-        f"[INFO] Device: {device['name']} | {device['marketingName']} | iOS {device['osVersion']} | {device['udid']}"
-    )
-    print(f"[INFO] Run root: {paths['run_root']}")
 
+def resolve_app(args, paths, destination):
     if args.skip_build:
         if args.skip_install and not args.app_path:
             app_path = None
         else:
             app_path = locate_existing_app(args.app_path, args.output_root)
     else:
-        app_path = build_app(args, paths, device["udid"])
+        app_path = build_app(args, paths, destination)
+    register_run(paths["run_root"].parent, paths["run_root"].name, app_path)
+    return app_path
 
-    record_metadata(paths, args, device, app_path)
 
-    if not args.skip_install:
-        install_app(device, app_path, paths, project_dir)
+def print_device(device):
+    print(
+        f"[INFO] Device: {device['name']} | {device['marketingName']} | iOS {device['osVersion']} | {device['udid']}"
+    )
+
+
+def device_slug(device):
+    # The full UDID: its leading chip ID is shared by every device with the same SoC.
+    name = re.sub(r"[^A-Za-z0-9._-]+", "-", device["name"]).strip("-") or "device"
+    udid = re.sub(r"[^A-Za-z0-9._-]+", "-", device["udid"])
+    return f"{name}-{udid}"
 
+
+def run_on_device(args, device, paths, app_future, project_dir, output_root, shared_stages, stop_capture):
+    stages = {}
+    app_path = None
     log_process = None
     log_thread = None
     stop_event = None
+    probe = LaunchProbe(args.process_name, parse_markers(args.marker))
+    watcher = CaptureWatcher(re.compile(args.until) if args.until else None)
+    result = {
+        "device": device,
+        "artifacts": str(paths["run_root"]),
+        "launchReturnMs": None,
+        "firstLogMs": None,
+        "captureEnd": None,
+    }
+    ensure_dir(paths["run_root"])
     try:
-        log_process, log_thread, stop_event = stream_device_logs(args, device, paths)
-        time.sleep(1)
+        stream_started = time.monotonic()
+        log_process, log_thread, stop_event, stream_ready = stream_device_logs(
+            args, device, paths, [probe, watcher]
+        )
+
+        app_path = app_future.result()
+        if not args.skip_install:
+            timed_stage(
+                stages, "install", install_app_if_changed, args, device, app_path, paths, project_dir, output_root
+            )
 
-        launch_payload = launch_app(args, device, paths, project_dir)
+        if not stream_ready.wait(DEFAULT_STREAM_READY_TIMEOUT):
+            print(f"[WARN] Log stream produced no output within {DEFAULT_STREAM_READY_TIMEOUT}s; launching anyway.")
+        stages["logStreamReady"] = round(time.monotonic() - stream_started, 3)
+
+        if args.repeat:
+            timed_stage(stages, "benchmark", run_launch_benchmark, args, device, paths, project_dir, probe)
+            return result
+
+        launched_at = time.time()
+        probe.reset(launched_at)
+        watcher.arm()
+        launch_payload = timed_stage(stages, "launch", launch_app, args, device, paths, project_dir)
+        returned_at = time.time()
+        probe.launched(returned_at, launched_pid(launch_payload))
+        result["launchReturnMs"] = elapsed_ms(launched_at, returned_at)
         paths["launch_payload"].write_text(
             json.dumps(launch_payload, indent=2, ensure_ascii=False),
             encoding="utf-8",
         )
 
-        if args.stay_attached:
-            print("[INFO] Streaming logs. Press Ctrl-C to stop.")
-            while True:
-                time.sleep(1)
-        else:
-            capture_seconds = max(args.log_seconds, DEFAULT_LAUNCH_LOG_GRACE_SECONDS)
-            time.sleep(capture_seconds)
-    except KeyboardInterrupt:
-        print("\n[INFO] Stopping log capture.")
+        capture_started = time.monotonic()
+        try:
+            if args.until or args.idle_timeout is not None:
+                result["captureEnd"] = wait_for_capture_end(args, watcher, stop_capture)
+                detail = f": {watcher.matched_line}" if result["captureEnd"] == "marker" else ""
+                print(f"[INFO] {device['name']} capture ended by {result['captureEnd']}{detail}")
+            elif args.stay_attached:
+                print(f"[INFO] Streaming logs from {device['name']}. Press Ctrl-C to stop.")
+                stop_capture.wait()
+            else:
+                stop_capture.wait(max(args.log_seconds, DEFAULT_LAUNCH_LOG_GRACE_SECONDS))
+        finally:
+            stages["capture"] = round(time.monotonic() - capture_started, 3)
+            with probe.lock:
+                result["firstLogMs"] = elapsed_ms(launched_at, probe.first_log_at)
+        return result
     finally:
         if log_process is not None and log_thread is not None and stop_event is not None:
             stop_log_stream(log_process, log_thread, stop_event)
+            if args.extract_metrics or args.metrics_baseline:
+                try:
+                    result["metricRegressions"] = extract_device_metrics(args, device, paths)
+                except (OSError, ValueError) as exc:
+                    print(f"[WARN] {device['name']}: metric extraction failed: {exc}")
+        result["stages"] = {**shared_stages, **stages}
+        record_metadata(paths, args, device, app_path, result["stages"], result["captureEnd"])
+
+
+def extract_device_metrics(args, device, paths):
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import device_log_metrics
+
+    config = device_log_metrics.load_config(args.metrics_config or device_log_metrics.DEFAULT_CONFIG)
+    summary = device_log_metrics.extract_run(paths["run_root"], config)
+    print(f"[INFO] {device['name']} metrics written to {paths['run_root'] / device_log_metrics.METRICS_DIR_NAME}")
+    if not args.metrics_baseline:
+        return 0
+    baseline_dir = Path(args.metrics_baseline).expanduser().resolve()
+    baseline = device_log_metrics.load_or_extract(baseline_dir, config)
+    rows = device_log_metrics.compare_summaries(summary, baseline, config)
+    device_log_metrics.print_comparison(rows)
+    return sum(row["status"] == "REGRESSION" for row in rows)
+
+
+def print_fan_out_summary(results):
+    header = (
+        f"{'device':<28} {'status':<7} {'launch_ms':>10} {'first_log_ms':>12} {'install_s':>9} "
+        f"{'capture_end':<12} error"
+    )
+    print(header)
+    print("-" * len(header))
+    for entry in results:
+        print(
+            f"{entry['device']['name'][:28]:<28} {entry['status']:<7} "
+            f"{format_ms(entry.get('launchReturnMs')):>10} {format_ms(entry.get('firstLogMs')):>12} "
+            f"{str((entry.get('stages') or {}).get('install', '')):>9} "
+            f"{entry.get('captureEnd') or '':<12} {entry.get('error') or ''}"
+        )
+
+
+def capture_exit_code(results):
+    codes = [CAPTURE_EXIT_CODES.get(entry.get("captureEnd"), 0) for entry in results]
+    return max(codes, default=0)
+
+
+def run_fan_out(args, devices, paths, app_future, project_dir, output_root, shared_stages):
+    stop_capture = threading.Event()
+    results = {}
+
+    def run_one(device):
+        device_paths = run_paths(paths["run_root"], device_slug(device))
+        try:
+            entry = run_on_device(
+                args, device, device_paths, app_future, project_dir, output_root, shared_stages, stop_capture
+            )
+            entry["status"] = "ok"
+        except BaseException as exc:
+            entry = {"device": device, "artifacts": str(device_paths["run_root"]), "status": "failed", "error": str(exc)}
+            print(f"[ERROR] {device['name']}: {exc}")
+        results[device["udid"]] = entry
+
+    threads = [threading.Thread(target=run_one, args=(device,), daemon=True) for device in devices]
+    for thread in threads:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        print("\n[INFO] Stopping log capture on all devices.")
+        stop_capture.set()
+        for thread in threads:
+            thread.join()
+
+    ordered = [results[device["udid"]] for device in devices if device["udid"] in results]
+    write_json_file(paths["run_root"] / "summary.json", {"stages": shared_stages, "devices": ordered})
+    print_fan_out_summary(ordered)
+    return ordered
+
+
+def gc_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="run_ios_device_debug.py gc",
+        description="Delete old device runs and unreferenced store content under the output root.",
+    )
+    parser.add_argument(
+        "--output-root",
+        default=str(Path(__file__).resolve().parents[1] / DEFAULT_OUTPUT_ROOT),
+        help="Directory that holds the runs, the store and runs_index.json.",
+    )
+    parser.add_argument("--keep-last", type=int, help="Keep only the N newest runs.")
+    parser.add_argument("--max-age-days", type=float, help="Delete runs older than this many days.")
+    parser.add_argument(
+        "--max-size-mb",
+        type=float,
+        help="Delete the oldest runs until the run directories fit in this many MB.",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted without deleting it.")
+    args = parser.parse_args(argv)
+    if args.keep_last is None and args.max_age_days is None and args.max_size_mb is None:
+        parser.error("give at least one of --keep-last, --max-age-days or --max-size-mb")
+    collect_garbage(Path(args.output_root).expanduser().resolve(), args)
+
+
+def run_started_at(path, entry):
+    if entry.get("startedAt"):
+        return entry["startedAt"]
+    try:
+        return time.mktime(time.strptime(path.name, "%Y%m%d-%H%M%S"))
+    except ValueError:
+        return path.stat().st_mtime
+
+
+def run_app_hashes(path, entry, output_root):
+    hashes = {entry.get("appHash")}
+    for metadata_path in [path / "run_metadata.json", *path.glob("*/run_metadata.json")]:
+        app_path = load_json_file(metadata_path).get("appPath")
+        if app_path:
+            hashes.add(store_app_hash(app_path, output_root))
+    hashes.discard(None)
+    return hashes
+
+
+def walk_files(path):
+    if path.is_symlink() or path.is_file():
+        yield path
+        return
+    for root, dirs, names in os.walk(path):
+        for name in names + [name for name in dirs if (Path(root) / name).is_symlink()]:
+            yield Path(root) / name
+
+
+def link_counts(paths):
+    counts = {}
+    for path in paths:
+        for file_path in walk_files(path):
+            stat = file_path.lstat()
+            key = (stat.st_dev, stat.st_ino)
+            entry = counts.setdefault(key, [0, stat.st_nlink, stat.st_size])
+            entry[0] += 1
+    return counts
+
+
+def reclaimable_bytes(paths):
+    return sum(size for count, nlink, size in link_counts(paths).values() if count >= nlink)
+
+
+def collect_garbage(output_root, args):
+    index_path = output_root / RUN_INDEX_NAME
+    store = output_root / STORE_DIR_NAME
+    with exclusive_lock(index_path, f"[INFO] Waiting for another run to update {index_path}"):
+        index = load_json_file(index_path)
+        indexed = index.get("runs", {})
+        runs = []
+        for path in output_root.iterdir():
+            if path.is_dir() and (path.name in indexed or RUN_SLUG_RE.match(path.name)):
+                entry = indexed.get(path.name, {})
+                runs.append(
+                    {
+                        "slug": path.name,
+                        "path": path,
+                        "startedAt": run_started_at(path, entry),
+                        "apps": run_app_hashes(path, entry, output_root),
+                    }
+                )
+        runs.sort(key=lambda run: run["startedAt"], reverse=True)
+
+        now = time.time()
+        doomed = set()
+        for position, run in enumerate(runs):
+            if args.keep_last is not None and position >= args.keep_last:
+                doomed.add(run["slug"])
+            if args.max_age_days is not None and now - run["startedAt"] > args.max_age_days * 86400:
+                doomed.add(run["slug"])
+        if args.max_size_mb is not None:
+            budget = args.max_size_mb * 1024 * 1024
+            used = 0
+            for run in runs:
+                if run["slug"] in doomed:
+                    continue
+                used += reclaimable_bytes([run["path"]])
+                if used > budget:
+                    doomed.add(run["slug"])
+
+        kept = [run for run in runs if run["slug"] not in doomed]
+        referenced = set().union(*(run["apps"] for run in kept))
+        for pinned in (index.get("latestApp"), load_json_file(output_root / BUILD_CACHE_NAME).get("appPath")):
+            if pinned and store_app_hash(pinned, output_root):
+                referenced.add(store_app_hash(pinned, output_root))
+        app_dirs = [path for path in (store / "apps").glob("*") if path.is_dir() and not path.name.startswith(".")]
+        doomed_apps = [path for path in app_dirs if path.name not in referenced]
+        doomed_runs = [run["path"] for run in runs if run["slug"] in doomed]
+
+        released = link_counts(doomed_apps)
+        doomed_objects = []
+        for path in (store / "objects").glob("*/*"):
+            stat = path.stat()
+            links_left = stat.st_nlink - released.get((stat.st_dev, stat.st_ino), [0])[0]
+            if links_left <= 1:
+                doomed_objects.append(path)
+        reclaimed = reclaimable_bytes(doomed_runs + doomed_apps + doomed_objects)
+
+        verb = "Would delete" if args.dry_run else "Deleting"
+        for run in runs:
+            if run["slug"] in doomed:
+                print(f"[INFO] {verb} run {run['slug']}")
+        for path in doomed_apps:
+            print(f"[INFO] {verb} stored app {path.name[:12]}")
+        if not args.dry_run:
+            for path in doomed_runs + doomed_apps:
+                shutil.rmtree(path)
+            for path in doomed_objects:
+                path.unlink()
+            for slug in doomed:
+                indexed.pop(slug, None)
+            if index.get("latestApp") and not Path(index["latestApp"]).exists():
+                index.pop("latestApp")
+            if index:
+                write_json_file(index_path, index)
+
+    summary = (
+        f"{len(doomed_runs)} runs, {len(doomed_apps)} stored apps, {len(doomed_objects)} objects, "
+        f"{reclaimed / (1024 * 1024):.1f} MB"
+    )
+    print(f"[DONE] {'Would reclaim' if args.dry_run else 'Reclaimed'} {summary}; kept {len(kept)} runs.")
+
+
+def main():
+    if sys.argv[1:2] == ["gc"]:
+        gc_main(sys.argv[2:])
+        return
+
+    ensure_tool("xcodebuild")
+    ensure_tool("xcrun")
+    ensure_tool("idevicesyslog")
+
+    args = parse_args()
+    if args.repeat is not None and args.repeat < 1:
+        raise SystemExit("[ERROR] --repeat must be at least 1.")
+    if args.until:
+        try:
+            re.compile(args.until)
+        except re.error as exc:
+            raise SystemExit(f"[ERROR] Invalid --until regex: {exc}") from exc
+    if args.max_seconds is not None and not args.until and args.idle_timeout is None:
+        raise SystemExit(
+            "[ERROR] --max-seconds only caps --until/--idle-timeout captures; use --log-seconds for a fixed capture window."
+        )
+    if args.device and args.devices:
+        raise SystemExit("[ERROR] Use either --device or --devices, not both.")
+    if args.devices and args.build_destination == "device":
+        raise SystemExit("[ERROR] --devices builds once for all devices; --build-destination device is not supported.")
+    if args.list_devices:
+        list_devices_and_exit()
+        return
+    if args.slice_logs:
+        print_log_slice(args)
+        return
+
+    project_dir = Path(args.project).resolve().parent
+    output_root = Path(args.output_root).expanduser().resolve()
+    ensure_dir(output_root)
+    run_slug = timestamp_slug()
+    paths = run_paths(output_root, run_slug)
+    ensure_dir(paths["run_root"])
+    if not args.fresh_derived_data:
+        paths["derived_data"] = (
+            Path(args.derived_data).expanduser().resolve()
+            if args.derived_data
+            else output_root / SHARED_DERIVED_DATA_NAME
+        )
+    print(f"[INFO] Run root: {paths['run_root']}")
+
+    stages = {}
+    pool = ThreadPoolExecutor(max_workers=2)
+    try:
+        devices_future = pool.submit(timed_stage, stages, "discovery", discover_devices, args, output_root)
+        app_future = None
+        if args.build_destination != "device":
+            app_future = pool.submit(timed_stage, stages, "build", resolve_app, args, paths, args.build_destination)
+
+        devices = devices_future.result()
+        for device in devices:
+            print_device(device)
+        if app_future is None:
+            app_future = pool.submit(
+                timed_stage, stages, "build", resolve_app, args, paths, f"id={devices[0]['udid']}"
+            )
+
+        if args.devices:
+            results = run_fan_out(args, devices, paths, app_future, project_dir, output_root, stages)
+            failed = [entry for entry in results if entry["status"] != "ok"]
+            print(f"[DONE] Artifacts written to {paths['run_root']}")
+            if failed:
+                raise SystemExit(f"[ERROR] {len(failed)} of {len(devices)} devices failed.")
+            exit_code = capture_exit_code(results)
+            if exit_code:
+                raise SystemExit(exit_code)
+            return
+
+        result = {}
+        try:
+            result = run_on_device(
+                args, devices[0], paths, app_future, project_dir, output_root, stages, threading.Event()
+            )
+        except KeyboardInterrupt:
+            print("\n[INFO] Stopping log capture.")
+    except BaseException:
+        # A failed or interrupted stage must not leave the build running until it finishes.
+        terminate_children()
+        raise
+    finally:
+        pool.shutdown(wait=False)
 
     print(f"[DONE] Artifacts written to {paths['run_root']}")
     print(f"[DONE] Device log: {paths['device_log']}")
+    print(f"[DONE] Structured device logs: {paths['device_segments']}")
+    exit_code = capture_exit_code([result])
+    if exit_code:
+        raise SystemExit(exit_code)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+TIMING_FILE_NAME = "build_timing.json"
+FULL_BUILD_RATIO = 0.9
+KEPT_FUNCTIONS = 200
+PHASE_RE = re.compile(r"^(?P<phase>[A-Za-z][\w ]*?) \((?P<tasks>\d+) tasks?\) \| (?P<seconds>\d+(?:\.\d+)?) seconds?\s*$")
+RESULT_RE = re.compile(r"^\*\* (?P<action>[A-Z ]+) (?P<status>SUCCEEDED|FAILED|INTERRUPTED) \*\*(?: \[(?P<seconds>\d+(?:\.\d+)?) sec\])?")
+FUNCTION_BODY_RE = re.compile(
+    r"^\s*(?P<ms>\d+(?:\.\d+)?)ms\s+(?P<file>/[^\t]+?\.swift):(?P<line>\d+):(?P<column>\d+)\s+(?P<name>.*?)\s*$"
+)
+TASK_RE = re.compile(r"^(?P<task>[A-Z][A-Za-z]+) .*\(in target '(?P<target>[^']+)' from project '(?P<project>[^']+)'\)\s*$")
+LEGACY_TARGET_RE = re.compile(r"^=== BUILD TARGET (?P<target>.+?) OF PROJECT (?P<project>.+?) WITH")
+SWIFT_PATH_RE = re.compile(r"(/(?:\\ |[^\s,])+\.swift)\b")
+COMPILE_TASKS = {"SwiftCompile", "CompileSwift", "CompileC"}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Summarize xcodebuild timing (-showBuildTimingSummary, -debug-time-function-bodies) from a build.log."
+    )
+    parser.add_argument("log", help="build.log, or a run_ios_device_debug.py run directory that contains one.")
+    parser.add_argument(
+        "--previous",
+        help="Previous build.log, run directory or build_timing.json (default: the newest older sibling run).",
+    )
+    parser.add_argument("--top", type=int, default=10, help="Rows to show per ranking (default: 10).")
+    parser.add_argument("--json", action="store_true", help="Print the parsed timing as JSON.")
+    parser.add_argument("--no-write", action="store_true", help="Do not write build_timing.json next to the log.")
+    return parser.parse_args()
+
+
+def unescape_path(path):
+    return path.replace("\\ ", " ")
+
+
+def compile_sources(task, line):
+    if task == "CompileC":
+        parts = line.split()
+        return [unescape_path(parts[2])] if len(parts) > 2 else []
+    return sorted({unescape_path(path) for path in SWIFT_PATH_RE.findall(line)})
+
+
+def parse_build_log(path):
+    timing = {
+        "log": str(path),
+        "status": None,
+        "totalSeconds": None,
+        "skipped": False,
+        "phases": {},
+        "targets": {},
+        "compileUnits": {},
+        "functions": [],
+    }
+    current_target = None
+    with Path(path).open(encoding="utf-8", errors="replace") as handle:
+        for number, raw in enumerate(handle):
+            line = raw.rstrip("\n")
+            if number == 0 and line.startswith("# build skipped"):
+                timing["skipped"] = True
+                continue
+
+            match = FUNCTION_BODY_RE.match(line)
+            if match:
+                source = match.group("file")
+                milliseconds = float(match.group("ms"))
+                unit = timing["compileUnits"].setdefault(source, {"target": current_target, "tasks": 0, "functionMs": 0.0})
+                unit["functionMs"] += milliseconds
+                timing["functions"].append(
+                    {"ms": milliseconds, "location": f"{source}:{match.group('line')}", "name": match.group("name")}
+                )
+                continue
+
+            match = TASK_RE.match(line)
+            if match:
+                task = match.group("task")
+                current_target = match.group("target")
+                target = timing["targets"].setdefault(current_target, {"tasks": 0, "compileTasks": 0, "functionMs": 0.0})
+                target["tasks"] += 1
+                if task in COMPILE_TASKS:
+                    target["compileTasks"] += 1
+                    for source in compile_sources(task, line):
+                        unit = timing["compileUnits"].setdefault(source, {"target": current_target, "tasks": 0, "functionMs": 0.0})
+                        unit["target"] = current_target
+                        unit["tasks"] += 1
+                continue
+
+            match = LEGACY_TARGET_RE.match(line)
+            if match:
+                current_target = match.group("target")
+                continue
+
+            match = PHASE_RE.match(line)
+            if match:
+                phase = timing["phases"].setdefault(match.group("phase"), {"tasks": 0, "seconds": 0.0})
+                phase["tasks"] += int(match.group("tasks"))
+                phase["seconds"] += float(match.group("seconds"))
+                continue
+
+            match = RESULT_RE.match(line)
+            if match:
+                timing["status"] = match.group("status")
+                if match.group("seconds"):
+                    timing["totalSeconds"] = float(match.group("seconds"))
+
+    for unit in timing["compileUnits"].values():
+        if unit["target"] in timing["targets"]:
+            timing["targets"][unit["target"]]["functionMs"] += unit["functionMs"]
+    timing["compiledUnits"] = sum(1 for unit in timing["compileUnits"].values() if unit["tasks"])
+    timing["functions"] = sorted(timing["functions"], key=lambda item: item["ms"], reverse=True)[:KEPT_FUNCTIONS]
+    return timing
+
+
+def classify_build(timing, previous):
+    known = max(timing["compiledUnits"], (previous or {}).get("knownUnits", 0))
+    timing["knownUnits"] = known
+    if timing["skipped"]:
+        kind = "skipped"
+    elif timing["compiledUnits"] == 0:
+        kind = "null"
+    elif timing["compiledUnits"] >= known * FULL_BUILD_RATIO:
+        kind = "full"
+    else:
+        kind = "incremental"
+    timing["kind"] = kind
+    timing["rebuiltFraction"] = round(timing["compiledUnits"] / known, 4) if known else None
+    return timing
+
+
+def log_path_for(path):
+    path = Path(path).expanduser().resolve()
+    return path / "build.log" if path.is_dir() else path
+
+
+def load_timing(path):
+    path = Path(path).expanduser().resolve()
+    if path.is_dir() and (path / TIMING_FILE_NAME).exists():
+        path = path / TIMING_FILE_NAME
+    if path.suffix == ".json":
+        return json.loads(path.read_text(encoding="utf-8"))
+    return classify_build(parse_build_log(log_path_for(path)), None)
+
+
+def previous_run_timing(log_path):
+    run_dir = log_path.parent
+    siblings = sorted(
+        (path for path in run_dir.parent.iterdir() if path.is_dir() and path.name < run_dir.name),
+        key=lambda path: path.name,
+        reverse=True,
+    )
+    for sibling in siblings:
+        candidate = sibling / TIMING_FILE_NAME
+        if candidate.exists():
+            return json.loads(candidate.read_text(encoding="utf-8"))
+    return None
+
+
+def analyze(log_path, previous=None, write=True):
+    log_path = log_path_for(log_path)
+    if previous is None:
+        previous = previous_run_timing(log_path)
+    timing = classify_build(parse_build_log(log_path), previous)
+    if previous is not None:
+        timing["previous"] = {
+            "log": previous.get("log"),
+            "totalSeconds": previous.get("totalSeconds"),
+            "kind": previous.get("kind"),
+            "compiledUnits": previous.get("compiledUnits"),
+        }
+    if write:
+        (log_path.parent / TIMING_FILE_NAME).write_text(json.dumps(timing, indent=2), encoding="utf-8")
+    return timing
+
+
+def format_seconds(value):
+    return "n/a" if value is None else f"{value:.2f}s"
+
+
+def print_report(timing, top):
+    total = timing["totalSeconds"]
+    print(f"[INFO] Build {timing['status'] or 'result unknown'} in {format_seconds(total)} ({timing['kind']})")
+    previous = timing.get("previous")
+    if previous and previous.get("totalSeconds") is not None and total is not None:
+        delta = total - previous["totalSeconds"]
+        print(
+            f"[INFO] Previous build {format_seconds(previous['totalSeconds'])} ({previous.get('kind')}); "
+            f"change {delta:+.2f}s"
+        )
+    if timing["knownUnits"]:
+        print(
+            f"[INFO] Compiled {timing['compiledUnits']} of {timing['knownUnits']} known compile units "
+            f"({timing['rebuiltFraction'] * 100:.1f}%)"
+        )
+
+    if timing["phases"]:
+        print("Slowest phases:")
+        for name, phase in sorted(timing["phases"].items(), key=lambda item: item[1]["seconds"], reverse=True)[:top]:
+            print(f"  {phase['seconds']:>9.2f}s  {phase['tasks']:>5} tasks  {name}")
+    if timing["targets"]:
+        print("Targets:")
+        ranked = sorted(
+            timing["targets"].items(), key=lambda item: (item[1]["functionMs"], item[1]["compileTasks"]), reverse=True
+        )
+        for name, target in ranked[:top]:
+            print(
+                f"  {target['functionMs'] / 1000:>9.2f}s  {target['compileTasks']:>5} compiles "
+                f"{target['tasks']:>5} tasks  {name}"
+            )
+    units = [(source, unit) for source, unit in timing["compileUnits"].items() if unit["functionMs"]]
+    if units:
+        print("Slowest compile units (function bodies):")
+        for source, unit in sorted(units, key=lambda item: item[1]["functionMs"], reverse=True)[:top]:
+            print(f"  {unit['functionMs']:>9.1f}ms  {Path(source).name}  ({unit['target'] or '?'})")
+    if timing["functions"]:
+        print("Slowest function bodies:")
+        for function in timing["functions"][:top]:
+            print(f"  {function['ms']:>9.1f}ms  {Path(function['location']).name}  {function['name']}")
+
+
+def main():
+    args = parse_args()
+    log_path = log_path_for(args.log)
+    if not log_path.exists():
+        raise SystemExit(f"[ERROR] Build log not found: {log_path}")
+    previous = load_timing(args.previous) if args.previous else None
+    timing = analyze(log_path, previous, write=not args.no_write)
+    if args.json:
+        json.dump(timing, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(timing, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Benchmark the Telegram Markdown normalizer and chunker on multi-MB text.
+
+Exits non-zero when a chunk exceeds its limit or when a case chunks more than
+--max-slowdown times slower per MB than the changelog case.
+
+Usage example:
+  python3 bench_post_channel_update.py --size-mb 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from post_channel_update import (  # noqa: E402
+    CAPTION_LIMIT,
+    MESSAGE_LIMIT,
+    chunk_text,
+    normalize_markdown_for_telegram,
+    utf16_len,
+)
+
+DEFAULT_SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "CHANGELOG.md")
+DEFAULT_MAX_SLOWDOWN = 3.0
+
+
+def build_corpus(source: str, size_bytes: int, blank_lines: int) -> str:
+    lines = source.splitlines()
+    out: list[str] = []
+    size = 0
+    while size < size_bytes:
+        for line in lines:
+            out.append(line)
+            out.extend([""] * blank_lines)
+            size += len(line.encode("utf-8")) + blank_lines + 1
+    return "\n".join(out)
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time normalize_markdown_for_telegram() and chunk_text().")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="Markdown file repeated to build the corpus")
+    parser.add_argument("--size-mb", type=float, default=4.0, help="Corpus size in MB (default: 4)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the best time is reported (default: 3)")
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        default=DEFAULT_MAX_SLOWDOWN,
+        help=(
+            "Fail when a case chunks more than this many times slower per MB than the changelog case "
+            f"(default: {DEFAULT_MAX_SLOWDOWN:g})"
+        ),
+    )
+    args = parser.parse_args()
+
+    with open(args.source, "r", encoding="utf-8") as f:
+        source = f.read()
+    size_bytes = int(args.size_mb * 1024 * 1024)
+    cases = {
+        "changelog": build_corpus(source, size_bytes, 0),
+        "blank-heavy": build_corpus(source, size_bytes, 20),
+        # Few or no entity markers: each chunk must not scan to the end of the text.
+        "marker-free": build_corpus("word " * 200, size_bytes, 0),
+        "unclosed": "_" + build_corpus("word " * 200, size_bytes, 0),
+        # Escapes count together with the escaped character against the limit.
+        "escapes": build_corpus("\\* \\_ a\\` \\[x\\] 😀\\😀 " * 20, size_bytes, 0),
+    }
+
+    chunk_s_per_mb: dict[str, float] = {}
+    print(f"{'case':<12} {'MB':>6} {'normalize_s':>12} {'chunk_s':>9} {'chunks':>7} {'caption_chunks':>15}")
+    for name, text in cases.items():
+        best_normalize = best_chunk = float("inf")
+        for _ in range(args.repeat):
+            normalized, elapsed = timed(normalize_markdown_for_telegram, text)
+            best_normalize = min(best_normalize, elapsed)
+            chunks, elapsed = timed(chunk_text, normalized, MESSAGE_LIMIT)
+            best_chunk = min(best_chunk, elapsed)
+        captions = chunk_text(normalized, CAPTION_LIMIT)
+        oversized = [chunk for chunk in chunks if utf16_len(chunk) > MESSAGE_LIMIT]
+        oversized += [chunk for chunk in captions if utf16_len(chunk) > CAPTION_LIMIT]
+        if oversized:
+            print(f"{name}: {len(oversized)} chunks exceed the limit", file=sys.stderr)
+            return 1
+        megabytes = len(text.encode("utf-8")) / (1024 * 1024)
+        chunk_s_per_mb[name] = best_chunk / megabytes
+        print(
+            f"{name:<12} {megabytes:>6.1f} {best_normalize:>12.3f} {best_chunk:>9.3f} "
+            f"{len(chunks):>7} {len(captions):>15}"
+        )
+
+    # Chunking should cost about the same per MB whatever the input looks like.
+    baseline = chunk_s_per_mb["changelog"]
+    slow = [name for name, rate in chunk_s_per_mb.items() if rate > baseline * args.max_slowdown]
+    for name in slow:
+        print(
+            f"{name}: chunking is {chunk_s_per_mb[name] / baseline:.1f}x slower per MB than changelog",
+            file=sys.stderr,
+        )
+    return 1 if slow else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
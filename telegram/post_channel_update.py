@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-"""Post a photo + combined markdown text to a Telegram channel.
+"""Post a photo (or other media) + combined markdown text to a Telegram channel.
 
 Usage example:
   TELEGRAM_BOT_TOKEN=xxx \
@@ -8,22 +8,62 @@ Usage example:
     --image /path/VersionUpdate.png \
     --top /path/top.md \
     --changelog /path/changelog.md
+
+All Bot API calls of a run share one keep-alive connection; use --api-base to
+point the script at a local stand-in server. --chat-ids broadcasts the same
+update to several chats in parallel under one bot-wide rate limit. Sent parts are
+journaled, so rerunning a failed post only sends what is missing (--force
+posts everything again) and --update edits the last post in place, touching
+only the message chunks whose text changed. Media files are streamed from
+disk, so --media-type video/document works for large files too.
 """
 
 from __future__ import annotations
 
 import argparse
+import bisect
+import copy
+import functools
+import hashlib
+import http.client
 import json
 import mimetypes
 import os
+import re
+import select
+import socket
 import sys
-import urllib.error
+import threading
+import time
 import urllib.parse
-import urllib.request
 import uuid
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
 CAPTION_LIMIT = 1024
 MESSAGE_LIMIT = 4096
+DEFAULT_API_BASE = "https://api.telegram.org"
+REQUEST_TIMEOUT = 60.0
+MAX_RATE_LIMIT_RETRIES = 5
+DEFAULT_RATE = 25.0
+DEFAULT_BURST = 5
+DEFAULT_CONCURRENCY = 4
+DEFAULT_CHUNK_SLACK = 256
+MARKDOWN_TOKEN_RE = re.compile(r"```|[\\*_`\[\]()]")
+# Plain text and escapes up to the next unescaped entity marker. As in the
+# token scan, an escaped ``` escapes the whole fence.
+ESCAPED_RUN_RE = re.compile(r"(?:[^\\*_`\[\]()]|\\[\s\S]|(?<=\\`)``)*")
+CLOSABLE_ENTITIES = ("*", "_", "`", "```")
+ASTRAL_RE = re.compile("[\U00010000-\U0010FFFF]")
+DEFAULT_FILE_ID_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".file_id_cache.json")
+DEFAULT_JOURNAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".post_journal.json")
+MEDIA_METHODS = {
+    "photo": "sendPhoto",
+    "video": "sendVideo",
+    "animation": "sendAnimation",
+    "document": "sendDocument",
+}
 
 
 def read_text(path: str) -> str:
@@ -74,133 +114,872 @@ def _is_version_line(line: str) -> bool:
 
 
 def normalize_markdown_for_telegram(text: str) -> str:
+    return "\n".join(iter_normalized_lines(text.splitlines()))
+
+
+def _heading_line(stripped: str) -> str | None:
     # Telegram Markdown does not support headings like "# Title".
     # Convert headings to bold using legacy Markdown: *bold*
-    lines = text.splitlines()
-    out: list[str] = []
-    for idx, line in enumerate(lines):
+    if not stripped.startswith("#"):
+        return None
+    i = 0
+    while i < len(stripped) and stripped[i] == "#":
+        i += 1
+    if i < len(stripped) and stripped[i] == " ":
+        content = stripped[i + 1 :].strip()
+        if content:
+            return f"*{content}*"
+    return None
+
+
+def iter_normalized_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Normalize Markdown line by line in a single pass.
+
+    A short standalone line is bolded when the next non-blank line is a list
+    item (or there is none), so it is held back, together with the blank
+    lines after it, until that next line arrives.
+    """
+    pending: str | None = None
+    blanks: list[str] = []
+    for line in lines:
         stripped = line.lstrip()
-        if stripped.startswith("#"):
-            i = 0
-            while i < len(stripped) and stripped[i] == "#":
-                i += 1
-            if i < len(stripped) and stripped[i] == " ":
-                content = stripped[i + 1 :].strip()
-                if content:
-                    out.append(f"*{content}*")
-                    continue
+        if pending is not None:
+            if not stripped.strip():
+                blanks.append(line)
+                continue
+            yield f"*{pending.strip()}*" if _is_list_like(stripped) else pending
+            yield from blanks
+            pending = None
+            blanks = []
+
+        heading = _heading_line(stripped)
+        if heading is not None:
+            yield heading
+            continue
 
         # Heuristic: bold short standalone lines as headings
-        if (
-            stripped
-            and not _is_list_like(stripped)
-            and len(stripped) <= 40
-            and ("。" not in stripped)
-        ):
-            next_line = ""
-            for j in range(idx + 1, len(lines)):
-                if lines[j].strip():
-                    next_line = lines[j].lstrip()
-                    break
-            if _is_version_line(stripped) or _is_list_like(next_line) or next_line == "":
-                out.append(f"*{stripped.strip()}*")
+        if stripped and not _is_list_like(stripped) and len(stripped) <= 40 and ("。" not in stripped):
+            if _is_version_line(stripped):
+                yield f"*{stripped.strip()}*"
+            else:
+                pending = line
+            continue
+
+        yield line
+
+    if pending is not None:
+        yield f"*{pending.strip()}*"
+        yield from blanks
+
+
+class TelegramAPIError(RuntimeError):
+    def __init__(self, message: str, error_code: int, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.error_code = error_code
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Token bucket shared by every sender of a run.
+
+    A 429 reply pauses the whole bucket for ``retry_after`` seconds, since
+    Telegram's flood control applies to the bot rather than to one chat.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.updated = self.paused_until
+            self.tokens = 0.0
+
+
+@functools.lru_cache(maxsize=None)
+def file_sha256(path: str) -> str:
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+def write_json_atomic(path: str, payload: object) -> None:
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, sort_keys=True, ensure_ascii=False)
+    os.replace(temporary, path)
+
+
+@dataclass(frozen=True)
+class Update:
+    media_type: str
+    media: str
+    text: str
+    parse_mode: str | None
+    chunk_slack: int = 0
+
+    def parts(self, previous: list[str] | None = None) -> list[tuple[str, str | None]]:
+        # Telegram caption limit is 1024 chars. If too long, send media without caption,
+        # then send the text as separate message(s). ``previous`` holds the text
+        # chunks of an earlier post whose boundaries should be kept if possible.
+        # Messages are filled to ``chunk_slack`` units below the limit so later
+        # --update edits can grow a message without moving text into the next.
+        if utf16_len(self.text) <= CAPTION_LIMIT:
+            return [("media", self.text)]
+        markdown = self.parse_mode == "Markdown"
+        fill = max(MESSAGE_LIMIT - self.chunk_slack, MESSAGE_LIMIT // 2)
+        if previous:
+            chunks: Iterable[str] = rechunk_like(self.text, MESSAGE_LIMIT, previous, markdown, fill)
+        else:
+            chunks = iter_chunks(self.text, fill, markdown)
+        return [("media", None)] + [("text", chunk) for chunk in chunks]
+
+
+class PostJournal:
+    """Records every part of a post as soon as Telegram accepts it.
+
+    Posts are keyed by a hash of the chat, the media content and the text, so
+    rerunning the same post continues after the last part that was sent. The
+    recorded message_ids also let --update edit the chat's last post in place.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.posts: dict[str, dict] = {}
+        if os.path.exists(path):
+            try:
+                self.posts = json.loads(read_text(path)).get("posts", {})
+            except json.JSONDecodeError:
+                self.posts = {}
+
+    @staticmethod
+    def post_key(chat_id: str, update: Update) -> str:
+        payload = json.dumps([chat_id, file_sha256(update.media), update.text], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def begin(self, key: str, chat_id: str, update: Update, total: int, force: bool) -> int:
+        with self.lock:
+            post = self.posts.get(key)
+            if post is None or force:
+                post = self.posts[key] = {
+                    "chat": chat_id,
+                    "mediaType": update.media_type,
+                    "media": update.media,
+                    "mediaHash": file_sha256(update.media),
+                    "parseMode": update.parse_mode,
+                    "parts": [],
+                    "total": total,
+                    "complete": False,
+                }
+            post["startedAt"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+            post["updatedAt"] = time.time()
+            self._save()
+            return len(post["parts"])
+
+    def record(self, key: str, kind: str, text: str | None, message_id: int | None) -> None:
+        with self.lock:
+            post = self.posts[key]
+            post["parts"].append({"kind": kind, "text": text, "messageId": message_id})
+            post["complete"] = len(post["parts"]) >= post["total"]
+            post["updatedAt"] = time.time()
+            self._save()
+
+    def latest(self, chat_id: str) -> tuple[str, dict] | None:
+        """Return (key, copy of the post) for the chat's most recent post that sent anything."""
+        with self.lock:
+            candidates = [
+                (post.get("updatedAt", 0.0), key)
+                for key, post in self.posts.items()
+                if post.get("chat") == chat_id and post.get("parts")
+            ]
+            if not candidates:
+                return None
+            _updated, key = max(candidates)
+            return key, copy.deepcopy(self.posts[key])
+
+    def store(self, key: str, post: dict, replaces: str | None = None) -> None:
+        with self.lock:
+            if replaces is not None and replaces != key:
+                self.posts.pop(replaces, None)
+            post["updatedAt"] = time.time()
+            self.posts[key] = copy.deepcopy(post)
+            self._save()
+
+    def _save(self) -> None:
+        write_json_atomic(self.path, {"posts": self.posts})
+
+
+class FileIdCache:
+    """Remembers the file_id Telegram returned for each uploaded media file.
+
+    Entries are keyed by bot, media type and the file's sha256, because a
+    file_id is only valid for the bot that uploaded it.
+    """
+
+    def __init__(self, path: str | None, token: str) -> None:
+        self.path = path
+        self.bot_id = token.split(":", 1)[0]
+        self.lock = threading.Lock()
+        self.uploads: dict[str, threading.Lock] = {}
+        self.entries: dict[str, str] = {}
+        if path and os.path.exists(path):
+            try:
+                self.entries = json.loads(read_text(path))
+            except json.JSONDecodeError:
+                self.entries = {}
+
+    def key(self, media_type: str, media: str) -> str:
+        return f"{self.bot_id}:{media_type}:{file_sha256(media)}"
+
+    def upload_lock(self, key: str) -> threading.Lock:
+        # Broadcast threads wait for the first upload of a file instead of all uploading it.
+        with self.lock:
+            return self.uploads.setdefault(key, threading.Lock())
+
+    def get(self, key: str) -> str | None:
+        with self.lock:
+            return self.entries.get(key)
+
+    def put(self, key: str, file_id: str | None) -> None:
+        with self.lock:
+            if file_id:
+                self.entries[key] = file_id
+            else:
+                self.entries.pop(key, None)
+            self._save()
+
+    def _save(self) -> None:
+        if self.path:
+            write_json_atomic(self.path, self.entries)
+
+
+def uploaded_file_id(response: dict, media_type: str) -> str | None:
+    media = (response.get("result") or {}).get(media_type)
+    if isinstance(media, list):
+        # Photos come back in several sizes; the last one is the original.
+        media = media[-1] if media else None
+    if isinstance(media, dict):
+        return media.get("file_id")
+    return None
+
+
+class MultipartBody:
+    """A multipart/form-data body whose file parts are streamed from disk.
+
+    The size of every part is known up front, so ``Content-Length`` can be
+    sent before the body and files never have to be held in memory.
+    """
+
+    def __init__(self, fields: dict[str, str], files: dict[str, tuple[str, str, str]]) -> None:
+        self.boundary = f"----tg-boundary-{uuid.uuid4().hex}"
+        self.parts: list[bytes | tuple[str, int]] = []
+        head = b""
+        for name, value in fields.items():
+            head += (
+                f"--{self.boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n".encode()
+                + value.encode()
+                + b"\r\n"
+            )
+        for name, (filename, path, mime) in files.items():
+            head += (
+                f"--{self.boundary}\r\n"
+                f"Content-Disposition: form-data; name=\"{name}\"; filename=\"{filename}\"\r\n"
+                f"Content-Type: {mime}\r\n\r\n"
+            ).encode()
+            self.parts.append(head)
+            self.parts.append((path, os.path.getsize(path)))
+            head = b"\r\n"
+        self.parts.append(head + f"--{self.boundary}--\r\n".encode())
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return sum(len(part) if isinstance(part, bytes) else part[1] for part in self.parts)
+
+    def write_to(self, conn: http.client.HTTPConnection) -> None:
+        for part in self.parts:
+            if isinstance(part, bytes):
+                conn.send(part)
                 continue
+            path, size = part
+            with open(path, "rb") as f:
+                # Uses os.sendfile() on plain sockets; TLS sockets fall back to send() of memoryview blocks.
+                sent = conn.sock.sendfile(f, 0, size)
+            if sent != size:
+                raise RuntimeError(f"{path} changed size while uploading ({sent} of {size} bytes sent)")
 
-        out.append(line)
-    return "\n".join(out)
 
+class TelegramSession:
+    """One keep-alive HTTP(S) connection to the Bot API, reused for every call.
 
-def build_multipart(fields: dict[str, str], files: dict[str, tuple[str, bytes, str]]) -> tuple[bytes, str]:
-    boundary = f"----tg-boundary-{uuid.uuid4().hex}"
-    lines: list[bytes] = []
+    A connection the server has closed while idle is reopened before it is
+    used, and a request that could not be written to a reused connection is
+    retried once on a new one. Once a request has been sent it is never
+    resent, since Telegram may already have acted on it. Each call's latency
+    is kept in ``timings``. 429 replies are
+    retried after ``retry_after``, through ``limiter`` when one is shared.
+    """
 
-    for name, value in fields.items():
-        lines.append(f"--{boundary}".encode())
-        lines.append(f"Content-Disposition: form-data; name=\"{name}\"".encode())
-        lines.append(b"")
-        lines.append(value.encode())
+    def __init__(
+        self,
+        api_base: str,
+        token: str,
+        timeout: float = REQUEST_TIMEOUT,
+        limiter: RateLimiter | None = None,
+    ) -> None:
+        parsed = urllib.parse.urlsplit(api_base)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise RuntimeError(f"Invalid API base: {api_base}")
+        self.https = parsed.scheme == "https"
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.path_prefix = f"{parsed.path.rstrip('/')}/bot{token}"
+        self.timeout = timeout
+        self.conn: http.client.HTTPConnection | None = None
+        self.limiter = limiter
+        self.retries = 0
+        self.timings: list[tuple[str, float, bool]] = []
 
-    for name, (filename, data, mime) in files.items():
-        lines.append(f"--{boundary}".encode())
-        lines.append(
-            f"Content-Disposition: form-data; name=\"{name}\"; filename=\"{filename}\"".encode()
-        )
-        lines.append(f"Content-Type: {mime}".encode())
-        lines.append(b"")
-        lines.append(data)
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.https:
+            conn = http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        else:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        conn.connect()
+        # Streamed bodies go out in several writes; don't let Nagle hold them back.
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn
 
-    lines.append(f"--{boundary}--".encode())
-    lines.append(b"")
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
 
-    body = b"\r\n".join(lines)
-    content_type = f"multipart/form-data; boundary={boundary}"
-    return body, content_type
+    def __enter__(self) -> TelegramSession:
+        return self
 
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
 
-def http_post(url: str, fields: dict[str, str], files: dict[str, tuple[str, bytes, str]] | None = None) -> dict:
-    if files:
-        body, content_type = build_multipart(fields, files)
-        headers = {"Content-Type": content_type}
-    else:
-        body = urllib.parse.urlencode(fields).encode()
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    def _send(
+        self, method: str, body: bytes | MultipartBody, headers: dict[str, str]
+    ) -> tuple[int, str, bytes, bool]:
+        if self.conn is not None and self._closed_by_server(self.conn):
+            self.close()
+        while True:
+            reused = self.conn is not None
+            try:
+                if self.conn is None:
+                    self.conn = self._connect()
+                if isinstance(body, MultipartBody):
+                    self.conn.putrequest("POST", f"{self.path_prefix}/{method}")
+                    for name, value in headers.items():
+                        self.conn.putheader(name, value)
+                    self.conn.endheaders()
+                    body.write_to(self.conn)
+                else:
+                    self.conn.request("POST", f"{self.path_prefix}/{method}", body=body, headers=headers)
+            except (http.client.CannotSendRequest, ConnectionResetError, BrokenPipeError) as e:
+                # The request never fully reached the server, so it cannot have been acted on.
+                self.close()
+                if reused:
+                    continue
+                raise RuntimeError(f"Request failed: {e}") from e
+            except (OSError, http.client.HTTPException) as e:
+                self.close()
+                raise RuntimeError(f"Request failed: {e}") from e
+            try:
+                resp = self.conn.getresponse()
+                data = resp.read()
+            except (OSError, http.client.HTTPException) as e:
+                self.close()
+                raise RuntimeError(f"{method} was sent but got no response, so it may have been applied: {e}") from e
+            if resp.will_close:
+                self.close()
+            return resp.status, resp.reason, data, reused
 
-    req = urllib.request.Request(url, data=body, headers=headers, method="POST")
-    try:
-        with urllib.request.urlopen(req) as resp:
-            data = resp.read().decode("utf-8")
-    except urllib.error.HTTPError as e:
-        data = e.read().decode("utf-8", errors="replace")
-        raise RuntimeError(f"HTTP {e.code} {e.reason}: {data}") from e
-    except urllib.error.URLError as e:
-        raise RuntimeError(f"Request failed: {e.reason}") from e
+    @staticmethod
+    def _closed_by_server(conn: http.client.HTTPConnection) -> bool:
+        # An idle keep-alive connection only turns readable when the server has
+        # closed it (or sent a TLS close_notify), so don't send on it.
+        if conn.sock is None:
+            return True
+        readable, _writable, _errored = select.select([conn.sock], [], [], 0)
+        return bool(readable)
+
+    def post(self, method: str, fields: dict[str, str], files: dict[str, tuple[str, str, str]] | None = None) -> dict:
+        body: bytes | MultipartBody
+        if files:
+            body = MultipartBody(fields, files)
+            content_type = body.content_type
+        else:
+            body = urllib.parse.urlencode(fields).encode()
+            content_type = "application/x-www-form-urlencoded"
+        headers = {"Content-Type": content_type, "Content-Length": str(len(body))}
+
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            if self.limiter is not None:
+                self.limiter.acquire()
+            started = time.perf_counter()
+            status, reason, data, reused = self._send(method, body, headers)
+            self.timings.append((method, (time.perf_counter() - started) * 1000, reused))
+
+            text = data.decode("utf-8", errors="replace")
+            try:
+                payload = json.loads(text)
+            except json.JSONDecodeError as e:
+                if status >= 400:
+                    raise TelegramAPIError(f"HTTP {status} {reason}: {text}", status) from e
+                raise RuntimeError(f"Invalid JSON response: {text}") from e
+            if status < 400:
+                return payload
+
+            retry_after = (payload.get("parameters") or {}).get("retry_after") if isinstance(payload, dict) else None
+            if status == 429 and attempt < MAX_RATE_LIMIT_RETRIES:
+                self.retries += 1
+                delay = float(retry_after or 1)
+                if self.limiter is not None:
+                    self.limiter.pause(delay)
+                else:
+                    time.sleep(delay)
+                continue
+            raise TelegramAPIError(f"HTTP {status} {reason}: {text}", status, retry_after)
+        raise AssertionError("unreachable")
 
-    try:
-        return json.loads(data)
-    except json.JSONDecodeError as e:
-        raise RuntimeError(f"Invalid JSON response: {data}") from e
 
+def print_timings(session: TelegramSession) -> None:
+    if session.timings:
+        print("Request latency:")
+    for method, elapsed_ms, reused in session.timings:
+        print(f"  {method}: {elapsed_ms:.1f} ms ({'reused connection' if reused else 'new connection'})")
+    if session.timings:
+        total = sum(elapsed_ms for _method, elapsed_ms, _reused in session.timings)
+        print(f"  {len(session.timings)} requests, {total:.1f} ms total")
 
-def send_photo(api_base: str, chat_id: str, image_path: str, caption: str | None, parse_mode: str | None) -> dict:
-    mime, _ = mimetypes.guess_type(image_path)
+
+def send_media(
+    session: TelegramSession,
+    chat_id: str,
+    media_type: str,
+    path: str,
+    caption: str | None,
+    parse_mode: str | None,
+    file_ids: FileIdCache | None = None,
+) -> dict:
+    mime, _ = mimetypes.guess_type(path)
     if not mime:
         mime = "application/octet-stream"
 
-    with open(image_path, "rb") as f:
-        image_bytes = f.read()
-
     fields: dict[str, str] = {"chat_id": chat_id}
     if caption:
         fields["caption"] = caption
     if parse_mode:
         fields["parse_mode"] = parse_mode
 
-    files = {"photo": (os.path.basename(image_path), image_bytes, mime)}
-    return http_post(f"{api_base}/sendPhoto", fields, files)
+    method = MEDIA_METHODS[media_type]
+    files = {media_type: (os.path.basename(path), path, mime)}
+    if file_ids is None:
+        return session.post(method, fields, files)
+
+    key = file_ids.key(media_type, path)
+    with file_ids.upload_lock(key):
+        cached = file_ids.get(key)
+        if not cached:
+            response = session.post(method, fields, files)
+            if response.get("ok"):
+                file_ids.put(key, uploaded_file_id(response, media_type))
+            return response
+
+    try:
+        return session.post(method, {**fields, media_type: cached})
+    except TelegramAPIError as exc:
+        if exc.error_code != 400 or "file" not in str(exc).lower():
+            raise
+    # Telegram no longer accepts this file_id; forget it and upload again.
+    file_ids.put(key, None)
+    response = session.post(method, fields, files)
+    if response.get("ok"):
+        file_ids.put(key, uploaded_file_id(response, media_type))
+    return response
 
 
-def send_message(api_base: str, chat_id: str, text: str, parse_mode: str | None) -> dict:
+def send_message(session: TelegramSession, chat_id: str, text: str, parse_mode: str | None) -> dict:
     fields: dict[str, str] = {"chat_id": chat_id, "text": text}
     if parse_mode:
         fields["parse_mode"] = parse_mode
-    return http_post(f"{api_base}/sendMessage", fields)
-
-
-def chunk_text(text: str, limit: int) -> list[str]:
-    chunks: list[str] = []
-    remaining = text
-    while len(remaining) > limit:
-        split_at = remaining.rfind("\n", 0, limit)
-        if split_at == -1:
-            split_at = remaining.rfind(" ", 0, limit)
-        if split_at == -1:
-            split_at = limit
-        chunk = remaining[:split_at].rstrip("\n")
-        chunks.append(chunk)
-        remaining = remaining[split_at:].lstrip("\n")
-    if remaining:
-        chunks.append(remaining)
-    return chunks
+    return session.post("sendMessage", fields)
+
+
+def edit_message(
+    session: TelegramSession,
+    method: str,
+    fields: dict[str, str],
+    files: dict[str, tuple[str, str, str]] | None = None,
+) -> dict:
+    try:
+        return session.post(method, fields, files)
+    except TelegramAPIError as exc:
+        # Telegram rejects edits that would leave a message unchanged; the
+        # message already shows what we wanted, so treat that as success.
+        if exc.error_code == 400 and "message is not modified" in str(exc):
+            return {"ok": True, "result": None}
+        raise
+
+
+def edit_message_text(
+    session: TelegramSession, chat_id: str, message_id: int, text: str, parse_mode: str | None
+) -> dict:
+    fields: dict[str, str] = {"chat_id": chat_id, "message_id": str(message_id), "text": text}
+    if parse_mode:
+        fields["parse_mode"] = parse_mode
+    return edit_message(session, "editMessageText", fields)
+
+
+def edit_message_caption(
+    session: TelegramSession, chat_id: str, message_id: int, caption: str | None, parse_mode: str | None
+) -> dict:
+    # An empty caption removes it, for when the text moves into separate messages.
+    fields: dict[str, str] = {"chat_id": chat_id, "message_id": str(message_id), "caption": caption or ""}
+    if caption and parse_mode:
+        fields["parse_mode"] = parse_mode
+    return edit_message(session, "editMessageCaption", fields)
+
+
+def edit_message_media(
+    session: TelegramSession,
+    chat_id: str,
+    message_id: int,
+    media_type: str,
+    path: str,
+    caption: str | None,
+    parse_mode: str | None,
+    file_ids: FileIdCache | None = None,
+) -> dict:
+    mime, _ = mimetypes.guess_type(path)
+    if not mime:
+        mime = "application/octet-stream"
+
+    def fields_for(source: str) -> dict[str, str]:
+        media: dict[str, str] = {"type": media_type, "media": source}
+        if caption:
+            media["caption"] = caption
+            if parse_mode:
+                media["parse_mode"] = parse_mode
+        return {"chat_id": chat_id, "message_id": str(message_id), "media": json.dumps(media, ensure_ascii=False)}
+
+    files = {"media": (os.path.basename(path), path, mime)}
+    if file_ids is None:
+        return edit_message(session, "editMessageMedia", fields_for("attach://media"), files)
+
+    key = file_ids.key(media_type, path)
+    with file_ids.upload_lock(key):
+        cached = file_ids.get(key)
+        if not cached:
+            response = edit_message(session, "editMessageMedia", fields_for("attach://media"), files)
+            if response.get("ok"):
+                file_ids.put(key, uploaded_file_id(response, media_type))
+            return response
+
+    try:
+        return edit_message(session, "editMessageMedia", fields_for(cached))
+    except TelegramAPIError as exc:
+        if exc.error_code != 400 or "file" not in str(exc).lower():
+            raise
+    # Telegram no longer accepts this file_id; forget it and upload again.
+    file_ids.put(key, None)
+    response = edit_message(session, "editMessageMedia", fields_for("attach://media"), files)
+    if response.get("ok"):
+        file_ids.put(key, uploaded_file_id(response, media_type))
+    return response
+
+
+def delete_message(session: TelegramSession, chat_id: str, message_id: int) -> dict:
+    return session.post("deleteMessage", {"chat_id": chat_id, "message_id": str(message_id)})
+
+
+def utf16_len(text: str) -> int:
+    # Telegram measures text limits in UTF-16 code units.
+    return len(text.encode("utf-16-le")) // 2
+
+
+class _Utf16Index:
+    """UTF-16 lengths of slices of one text, from the positions of its astral characters."""
+
+    def __init__(self, text: str) -> None:
+        self.astral = [match.start() for match in ASTRAL_RE.finditer(text)]
+
+    def units(self, start: int, stop: int) -> int:
+        if not self.astral:
+            return stop - start
+        return stop - start + bisect.bisect_left(self.astral, stop) - bisect.bisect_left(self.astral, start)
+
+    def fit(self, start: int, stop: int, budget: int) -> int:
+        # First index from ``start`` whose character no longer fits in ``budget`` units.
+        if self.units(start, stop) <= budget:
+            return stop
+        low, high = start, stop
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.units(start, middle) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+
+def _next_chunk(
+    text: str, index: _Utf16Index, start: int, limit: int, markdown: bool, reopen: str
+) -> tuple[int, int, str]:
+    """Find where the chunk beginning at ``start`` should end.
+
+    Returns ``(end, next_start, close)``; ``close`` is the marker appended to
+    close an entity that is too long for one message and gets reopened in the
+    next chunk. Preferred split points are the last newline, then the last
+    space, then the start of the entity that would overflow, all outside
+    Markdown entities. Only entity markers are visited one by one; the text
+    between them is measured in slices, and markers are only searched for
+    within ``limit`` characters of ``start``, so chunking stays linear.
+    """
+    n = len(text)
+    entity = reopen or None
+    entity_at = start
+    outside: list[tuple[int, int]] = []
+    outside_from = None if entity else start
+    skip_until = start
+    i = start
+    # A chunk never spans more than ``limit`` characters; the extra two let a
+    # ``` fence that starts right at the edge still match whole.
+    window = min(n, start + limit + 2)
+    # The chunk so far is text[start:i] plus the reopened marker. Its exact
+    # UTF-16 length is only measured once it could be near the limit, that is
+    # when counting every astral character up to the window edge twice (the
+    # ``spare`` units) would no longer fit.
+    spare = index.units(start, min(n, window + 2)) - (min(n, window + 2) - start)
+    tokens = MARKDOWN_TOKEN_RE.finditer(text, start, window) if markdown else iter(())
+    skip_runs = True
+    while True:
+        match = next(tokens, None)
+        if match is not None and match.start() < skip_until:
+            continue
+        stop = match.start() if match else n
+        budget = limit - len(reopen) - (len(entity) if entity in CLOSABLE_ENTITIES else 0)
+        if stop - start + spare > budget:
+            cut = max(index.fit(start, stop, budget), i)
+            if cut < stop:
+                break
+        i = stop
+        if match is None:
+            return n, n, ""
+
+        token = match.group()
+        # An escape is taken together with the character it escapes.
+        escape = entity is None and token == "\\"
+        token_end = min(i + 2, n) if escape else match.end()
+        if token_end - start + spare > budget and index.units(start, token_end) > budget:
+            cut = i
+            break
+        opened = closed = False
+        if entity is None:
+            if escape:
+                skip_until = i + 2
+            elif token in ("```", "*", "_", "`", "["):
+                entity, entity_at, opened = token, i, True
+        elif entity == "```" and token == "```":
+            closed = True
+        elif entity in ("*", "_", "`") and token[0] == entity:
+            closed = True
+        elif entity == "[" and token == "]":
+            if text.startswith("(", i + 1):
+                entity = "]("
+            else:
+                closed = True
+        elif entity == "](" and token == ")":
+            closed = True
+
+        if opened and outside_from is not None:
+            outside.append((outside_from, i))
+            outside_from = None
+        i = match.end()
+        if closed:
+            entity = None
+            outside_from = i
+        if escape and skip_until <= n:
+            i = skip_until
+            # Escapes change no state, so a run of them is stepped over in one
+            # match, up to where the chunk fills, instead of token by token.
+            run_end = ESCAPED_RUN_RE.match(text, i, window).end() if skip_runs else i
+            if run_end - start + spare > budget and index.units(start, run_end) > budget:
+                run_end = ESCAPED_RUN_RE.match(text, i, index.fit(start, run_end, budget)).end()
+                skip_runs = False
+            if run_end > i:
+                i = skip_until = run_end
+                # A cut inside an escaped ``` leaves the rest of it plain text.
+                fence_rest = i + 2 <= window and text.startswith("\\```", i - 2)
+                tokens = MARKDOWN_TOKEN_RE.finditer(text, i + 2 if fence_rest else i, window)
+
+    if outside_from is not None:
+        outside.append((outside_from, cut))
+    for separator in ("\n", " "):
+        for low, high in reversed(outside):
+            found = text.rfind(separator, max(low, start + 1), high)
+            if found != -1:
+                return found, found + 1, ""
+    if entity is not None and entity_at > start:
+        return entity_at, entity_at, ""
+    if entity is None:
+        return max(cut, start + 1), max(cut, start + 1), ""
+    if entity in ("*", "_"):
+        # A single entity longer than the limit: close it here and reopen it in the next chunk.
+        found = text.rfind(" ", entity_at + 1, cut)
+        if found > start:
+            return found, found + 1, entity
+    if entity in CLOSABLE_ENTITIES and cut > start:
+        return cut, cut, entity
+    return max(cut, start + 1), max(cut, start + 1), ""
+
+
+def iter_chunks(text: str, limit: int, markdown: bool = True) -> Iterator[str]:
+    """Split ``text`` into messages of at most ``limit`` UTF-16 code units.
+
+    Each chunk is scanned once, so the whole text is processed in linear time,
+    and splits never fall inside a Markdown entity.
+    """
+    for chunk, _start, _reopen in _chunk_spans(text, limit, markdown):
+        yield chunk
+
+
+def _chunk_spans(text: str, limit: int, markdown: bool) -> Iterator[tuple[str, int, str]]:
+    # Yields each chunk with the offset and reopened marker the next chunk starts from.
+    index = _Utf16Index(text)
+    start = 0
+    reopen = ""
+    n = len(text)
+    while start < n:
+        end, next_start, close = _next_chunk(text, index, start, limit, markdown, reopen)
+        chunk = reopen + text[start:end]
+        chunk = chunk + close if close else chunk.rstrip("\n")
+        reopen = close
+        start = next_start
+        if not reopen:
+            while start < n and text[start] == "\n":
+                start += 1
+        if chunk.strip():
+            yield chunk, start, reopen
+
+
+def _layout_changes(old: list[str], new: list[str]) -> int:
+    # API calls needed to turn messages showing ``old`` into ``new``: one per
+    # changed position plus one per message sent or deleted.
+    return sum(a != b for a, b in zip(old, new)) + abs(len(old) - len(new))
+
+
+def _find_chunk(text: str, chunk: str, at: int, forward: bool) -> int:
+    # Where ``chunk`` sits verbatim next to ``at``, with only whitespace in
+    # between: after ``at`` when walking forward, ending before it otherwise.
+    # Returns -1 when the text there no longer matches the chunk.
+    if forward:
+        start = at
+        while start < len(text) and text[start].isspace():
+            start += 1
+        start -= len(chunk) - len(chunk.lstrip())
+        if start < at or not text.startswith(chunk, start):
+            return -1
+    else:
+        stop = at
+        while stop > 0 and text[stop - 1].isspace():
+            stop -= 1
+        start = stop + len(chunk) - len(chunk.rstrip()) - len(chunk)
+        if start < 0 or start + len(chunk) > at or not text.startswith(chunk, start):
+            return -1
+    end = start + len(chunk)
+    if (start > 0 and not text[start - 1].isspace()) or (end < len(text) and not text[end].isspace()):
+        return -1
+    return start
+
+
+def rechunk_like(
+    text: str, limit: int, previous: list[str], markdown: bool = True, fill: int | None = None
+) -> list[str]:
+    """Chunk ``text`` reusing the chunks of ``previous`` where possible.
+
+    Previous chunks that still open or close the text verbatim are kept as
+    they are and only the text in between is chunked again, so an edit
+    inside one chunk changes just that chunk. New text is chunked up to
+    ``fill`` units, but re-chunked text may use the whole ``limit``; the
+    difference is the slack that lets an edit grow a chunk without pushing
+    text into every later message.
+    """
+    fill = fill or limit
+
+    def keepable(chunk: str) -> bool:
+        return list(iter_chunks(chunk, limit, markdown)) == [chunk]
+
+    head: list[str] = []
+    head_end = 0
+    for chunk in previous:
+        found = _find_chunk(text, chunk, head_end, forward=True)
+        if found == -1 or not keepable(chunk):
+            break
+        head.append(chunk)
+        head_end = found + len(chunk)
+    if len(head) == len(previous) and not text[head_end:].strip():
+        return head
+
+    # Walk back over the previous chunks that still end the text verbatim.
+    starts = {len(previous): len(text)}
+    tail_start = len(text)
+    for kept in range(len(previous) - 1, len(head) - 1, -1):
+        found = _find_chunk(text, previous[kept], tail_start, forward=False)
+        if found == -1 or found < head_end or not keepable(previous[kept]):
+            break
+        starts[kept] = tail_start = found
+
+    # An edit that outgrows its chunk's slack spills into the next one, so
+    # widen the re-chunked middle one previous chunk at a time until it lines up.
+    plain = list(iter_chunks(text, fill, markdown))
+    best, best_changes = plain, _layout_changes(previous, plain)
+    for kept in sorted(starts):
+        middle_text = text[head_end : starts[kept]].lstrip("\n").rstrip()
+        aligned = False
+        for middle_limit in (fill, limit):
+            middle = list(iter_chunks(middle_text, middle_limit, markdown))
+            anchored = head + middle + previous[kept:]
+            changes = _layout_changes(previous, anchored)
+            if changes < best_changes:
+                best, best_changes = anchored, changes
+            aligned = aligned or len(head) + len(middle) == kept
+        if aligned:
+            break
+    return best
+
+
+def chunk_text(text: str, limit: int, markdown: bool = True) -> list[str]:
+    return list(iter_chunks(text, limit, markdown))
 
 
 def main() -> int:
@@ -208,7 +987,36 @@ def main() -> int:
     parser.add_argument("--token", default=None, help="Bot token (overrides env and .token file)")
     parser.add_argument("--token-file", default="/Volumes/Data/Github/eisonAI/telegram/.token", help="Path to .token file")
     parser.add_argument("--chat-id", default="@RonnieAppsChannel", help="Channel username or chat ID")
+    parser.add_argument(
+        "--chat-ids",
+        default=None,
+        help="Comma-separated chat IDs to broadcast to concurrently (overrides --chat-id)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Chats posted to in parallel when broadcasting (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_RATE,
+        help=f"Bot-wide request rate limit in requests/second (default: {DEFAULT_RATE:g})",
+    )
+    parser.add_argument(
+        "--burst",
+        type=int,
+        default=DEFAULT_BURST,
+        help=f"Requests allowed back to back before --rate applies (default: {DEFAULT_BURST})",
+    )
     parser.add_argument("--image", default="/Volumes/Data/Github/eisonAI/telegram/VersionUpdate.png")
+    parser.add_argument(
+        "--media-type",
+        choices=sorted(MEDIA_METHODS),
+        default="photo",
+        help="How to send --image: photo, video, animation or document (default: photo)",
+    )
     parser.add_argument("--top", default="/Volumes/Data/Github/eisonAI/telegram/top.md")
     parser.add_argument("--changelog", default="/Volumes/Data/Github/eisonAI/telegram/changelog.md")
     parser.add_argument("--parse-mode", default="Markdown", help="Markdown, MarkdownV2, or HTML (default: Markdown)")
@@ -218,6 +1026,57 @@ def main() -> int:
         action="store_true",
         help="Do not normalize Markdown headings for Telegram",
     )
+    parser.add_argument(
+        "--api-base",
+        default=DEFAULT_API_BASE,
+        help=f"Bot API base URL, e.g. http://127.0.0.1:8081 for a local stand-in (default: {DEFAULT_API_BASE})",
+    )
+    parser.add_argument(
+        "--file-id-cache",
+        default=DEFAULT_FILE_ID_CACHE,
+        help="JSON file mapping uploaded media (by content hash) to reusable Telegram file_ids",
+    )
+    parser.add_argument(
+        "--no-file-id-cache",
+        action="store_true",
+        help="Always upload the media instead of reusing a cached file_id",
+    )
+    parser.add_argument(
+        "--journal",
+        default=DEFAULT_JOURNAL,
+        help="JSON file recording each sent part and its message_id, used to resume failed posts",
+    )
+    resume_group = parser.add_mutually_exclusive_group()
+    resume_group.add_argument(
+        "--resume",
+        action="store_true",
+        default=True,
+        help="Skip parts the journal says were already sent for this exact post (default)",
+    )
+    resume_group.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore the journal and post every part again",
+    )
+    resume_group.add_argument(
+        "--update",
+        action="store_true",
+        help=(
+            "Edit the chat's last journaled post in place, touching only the chunks that changed. "
+            "Messages keep their old boundaries where the text still matches, but an edit that "
+            "outgrows its message's --chunk-slack pushes text into the following messages and "
+            "every one of them is edited; the planned edit count is printed first"
+        ),
+    )
+    parser.add_argument(
+        "--chunk-slack",
+        type=int,
+        default=DEFAULT_CHUNK_SLACK,
+        help=(
+            "UTF-16 units left free in each text message when posting, so --update edits can "
+            f"grow a message without reflowing the rest (default: {DEFAULT_CHUNK_SLACK})"
+        ),
+    )
     parser.add_argument("--dry-run", action="store_true", help="Print merged text and exit")
     args = parser.parse_args()
 
@@ -239,28 +1098,216 @@ def main() -> int:
     if args.no_parse_mode:
         args.parse_mode = None
 
-    api_base = f"https://api.telegram.org/bot{token}"
+    if args.chunk_slack < 0:
+        parser.error("--chunk-slack must not be negative")
+
+    update = Update(args.media_type, args.image, merged, args.parse_mode, args.chunk_slack)
+    limiter = RateLimiter(args.rate, args.burst)
+    file_ids = None if args.no_file_id_cache else FileIdCache(args.file_id_cache, token)
+    journal = PostJournal(args.journal)
+    if args.chat_ids:
+        chat_ids = [chat_id.strip() for chat_id in args.chat_ids.split(",") if chat_id.strip()]
+        results = broadcast(
+            args.api_base,
+            token,
+            chat_ids,
+            args.concurrency,
+            limiter,
+            update,
+            file_ids,
+            journal,
+            args.force,
+            args.update,
+        )
+        print_broadcast_summary(results)
+        return 0 if all(result["ok"] for result in results) else 1
 
-    # Telegram caption limit is 1024 chars. If too long, send photo without caption,
-    # then send the text as separate message(s).
-    if len(merged) <= CAPTION_LIMIT:
-        response = send_photo(api_base, args.chat_id, args.image, merged, args.parse_mode)
+    with TelegramSession(args.api_base, token, limiter=limiter) as session:
+        try:
+            if args.update:
+                message = update_post(session, args.chat_id, update, journal, file_ids)
+            else:
+                message = post_update(session, args.chat_id, update, file_ids, journal, args.force)
+        finally:
+            print_timings(session)
+    print(message)
+    return 0
+
+
+def broadcast(
+    api_base: str,
+    token: str,
+    chat_ids: list[str],
+    concurrency: int,
+    limiter: RateLimiter,
+    update: Update,
+    file_ids: FileIdCache | None = None,
+    journal: PostJournal | None = None,
+    force: bool = False,
+    edit: bool = False,
+) -> list[dict]:
+    # One session (and thread) per chat keeps each chat's messages in order;
+    # the shared limiter keeps the bot as a whole under Telegram's flood limits.
+    def post_to(chat_id: str) -> dict:
+        started = time.perf_counter()
+        result: dict = {"chat": chat_id, "ok": False, "error": None}
+        with TelegramSession(api_base, token, limiter=limiter) as session:
+            try:
+                if edit and journal is not None:
+                    result["message"] = update_post(session, chat_id, update, journal, file_ids)
+                else:
+                    result["message"] = post_update(session, chat_id, update, file_ids, journal, force)
+                result["ok"] = True
+            except Exception as exc:
+                result["error"] = str(exc)
+            result["requests"] = len(session.timings)
+            result["retries"] = session.retries
+        result["seconds"] = time.perf_counter() - started
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        return list(pool.map(post_to, chat_ids))
+
+
+def print_broadcast_summary(results: list[dict]) -> None:
+    width = max([len("chat")] + [len(result["chat"]) for result in results])
+    print(f"{'chat':<{width}}  status  requests  retries  seconds  result")
+    for result in results:
+        status = "ok" if result["ok"] else "failed"
+        print(
+            f"{result['chat']:<{width}}  {status:<6}  {result['requests']:>8}  {result['retries']:>7}  "
+            f"{result['seconds']:>7.2f}  {result['error'] or result.get('message') or ''}"
+        )
+    failed = sum(not result["ok"] for result in results)
+    print(f"Posted to {len(results) - failed} of {len(results)} chats.")
+
+
+def post_update(
+    session: TelegramSession,
+    chat_id: str,
+    update: Update,
+    file_ids: FileIdCache | None = None,
+    journal: PostJournal | None = None,
+    force: bool = False,
+) -> str:
+    parts = update.parts()
+    key = PostJournal.post_key(chat_id, update) if journal else ""
+    already_sent = journal.begin(key, chat_id, update, len(parts), force) if journal else 0
+    if already_sent >= len(parts):
+        return f"Already posted all {len(parts)} parts; use --force to post again."
+
+    for kind, text in parts[already_sent:]:
+        if kind == "media":
+            method = MEDIA_METHODS[update.media_type]
+            parse_mode = update.parse_mode if text else None
+            response = send_media(session, chat_id, update.media_type, update.media, text, parse_mode, file_ids)
+        else:
+            method = "sendMessage"
+            response = send_message(session, chat_id, text or "", update.parse_mode)
         if not response.get("ok"):
-            raise RuntimeError(f"sendPhoto failed: {response}")
-        print("Posted photo with caption.")
-        return 0
+            raise RuntimeError(f"{method} failed: {response}")
+        if journal:
+            journal.record(key, kind, text, (response.get("result") or {}).get("message_id"))
 
-    response = send_photo(api_base, args.chat_id, args.image, None, None)
-    if not response.get("ok"):
-        raise RuntimeError(f"sendPhoto failed: {response}")
+    sent = len(parts) - already_sent
+    if already_sent:
+        return f"Resumed: posted the remaining {sent} of {len(parts)} parts."
+    if len(parts) == 1:
+        return f"Posted {update.media_type} with caption."
+    return f"Posted {update.media_type} and {sent - 1} text messages."
 
-    for chunk in chunk_text(merged, MESSAGE_LIMIT):
-        response = send_message(api_base, args.chat_id, chunk, args.parse_mode)
+
+def update_post(
+    session: TelegramSession,
+    chat_id: str,
+    update: Update,
+    journal: PostJournal,
+    file_ids: FileIdCache | None = None,
+) -> str:
+    """Edit the chat's last journaled post so it shows ``update``.
+
+    The new text is chunked along the old boundaries where it still matches,
+    then compared by position: only changed chunks are edited, extra chunks
+    are sent after the last message and surplus messages are deleted. The
+    planned number of edits is printed before anything is sent.
+    """
+    previous = journal.latest(chat_id)
+    if previous is None:
+        raise RuntimeError(f"No journaled post for {chat_id} to update; post it without --update first.")
+    old_key, post = previous
+    old_parts = post["parts"]
+    parts = update.parts([part["text"] for part in old_parts if part["kind"] == "text"])
+    media_changed = post.get("mediaType") != update.media_type or post.get("mediaHash") not in (
+        None,
+        file_sha256(update.media),
+    )
+
+    changed = [
+        index
+        for index, (kind, text) in enumerate(parts)
+        if index >= len(old_parts) or (kind == "media" and media_changed) or old_parts[index]["text"] != text
+    ]
+    planned_sends = max(len(parts) - len(old_parts), 0)
+    print(
+        f"[{chat_id}] Update plan: {len(changed) - planned_sends} edit(s), {planned_sends} send(s), "
+        f"{max(len(old_parts) - len(parts), 0)} delete(s) across {len(parts)} message(s)."
+    )
+
+    edited = sent = deleted = 0
+    for index in changed:
+        kind, text = parts[index]
+        old = old_parts[index] if index < len(old_parts) else None
+        if old is None:
+            method = "sendMessage"
+            response = send_message(session, chat_id, text or "", update.parse_mode)
+            message_id = (response.get("result") or {}).get("message_id")
+            sent += 1
+        else:
+            message_id = old["messageId"]
+            if kind == "media" and media_changed:
+                method = "editMessageMedia"
+                response = edit_message_media(
+                    session, chat_id, message_id, update.media_type, update.media, text, update.parse_mode, file_ids
+                )
+            elif kind == "media":
+                method = "editMessageCaption"
+                response = edit_message_caption(session, chat_id, message_id, text, update.parse_mode)
+            else:
+                method = "editMessageText"
+                response = edit_message_text(session, chat_id, message_id, text or "", update.parse_mode)
+            edited += 1
         if not response.get("ok"):
-            raise RuntimeError(f"sendMessage failed: {response}")
+            raise RuntimeError(f"{method} failed: {response}")
+        # Journal every step so a failed update can simply be rerun.
+        part = {"kind": kind, "text": text, "messageId": message_id}
+        if old is None:
+            old_parts.append(part)
+        else:
+            old_parts[index] = part
+        journal.store(old_key, post)
 
-    print("Posted photo and text messages.")
-    return 0
+    while len(old_parts) > len(parts):
+        response = delete_message(session, chat_id, old_parts[-1]["messageId"])
+        if not response.get("ok"):
+            raise RuntimeError(f"deleteMessage failed: {response}")
+        old_parts.pop()
+        deleted += 1
+        journal.store(old_key, post)
+
+    post.update(
+        {
+            "mediaType": update.media_type,
+            "media": update.media,
+            "mediaHash": file_sha256(update.media),
+            "parseMode": update.parse_mode,
+            "total": len(parts),
+            "complete": True,
+        }
+    )
+    journal.store(PostJournal.post_key(chat_id, update), post, replaces=old_key)
+    if not (edited or sent or deleted):
+        return "Post is already up to date."
+    return f"Updated post: {edited} edited, {sent} sent, {deleted} deleted."
 
 
 if __name__ == "__main__":